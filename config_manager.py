@@ -1,8 +1,14 @@
 # WPSG Configuration Manager - UPDATED VERSION WITH TRANSLATIONS AND NORMALIZATION FIX
+import copy
 import json
 import os
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
+
+from src.utils.duplicate_matcher import find_duplicate_groups
+from src.utils.locking import (ScanGuard, VersionConflictError, content_version, file_version,
+                               lock_for, process_lock, temp_path)
+from src.utils.record_store import RecordTable, StandardRecord, file_signature, read_snapshot, write_snapshot
 
 
 class ConfigManager:
@@ -16,6 +22,11 @@ class ConfigManager:
         self.recently_published_db_file = os.path.join(config_dir, "recently_published_database.json")
         self.iso_deleted_db_file = os.path.join(config_dir, "iso_deleted_database.json")
         
+        self._table_cache = {}
+        self._duplicate_cache = {}
+        # Only one scan may run at a time (see wpsg_app.perform_scan)
+        self.scan_guard = ScanGuard()
+
         # Ensure config directory exists
         os.makedirs(config_dir, exist_ok=True)
         
@@ -172,8 +183,7 @@ class ConfigManager:
             "iso_standards": [s for s in sample_standards if s['organization'] == 'ISO']
         }
         
-        with open(self.recently_published_db_file, 'w', encoding='utf-8') as f:
-            json.dump(database, f, indent=2, ensure_ascii=False)
+        self._write_json(self.recently_published_db_file, database)
     
     def _create_iso_deleted_database(self):
         """Create ISO deleted standards database"""
@@ -202,42 +212,85 @@ class ConfigManager:
             "iso_standards": sample_standards
         }
         
-        with open(self.iso_deleted_db_file, 'w', encoding='utf-8') as f:
-            json.dump(database, f, indent=2, ensure_ascii=False)
+        self._write_json(self.iso_deleted_db_file, database)
     
+    def _read_json(self, path: str):
+        """Read a JSON file together with its content version under the file's read lock"""
+        with lock_for(path).read():
+            with open(path, 'rb') as f:
+                raw = f.read()
+            return json.loads(raw), content_version(raw)
+
+    def _write_json(self, path: str, data: Dict[str, Any], expected_version=None):
+        """Atomically replace a JSON file under its write lock
+
+        With 'expected_version' the save is refused (VersionConflictError) if
+        the file changed since it was loaded, e.g. by another process. The
+        check and the replace run under the process lock as well, so two
+        processes can't both pass the check.
+        """
+        with lock_for(path).write(), process_lock(path):
+            if expected_version is not None and file_version(path) != expected_version:
+                raise VersionConflictError(f"{path} was modified since it was loaded")
+            tmp_path = temp_path(path)
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file"""
+        return self.load_config_versioned()[0]
+
+    def load_config_versioned(self):
+        """Load configuration and the version to pass back to save_config"""
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._read_json(self.config_file)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error loading config: {e}")
             self._create_default_config()
-            return self.load_config()
+            return self.load_config_versioned()
     
-    def save_config(self, config: Dict[str, Any]) -> bool:
+    def save_config(self, config: Dict[str, Any], expected_version=None) -> bool:
         """Save configuration to JSON file"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            self._write_json(self.config_file, config, expected_version)
             return True
         except Exception as e:
             print(f"Error saving config: {e}")
             return False
+
+    def _modify_config(self, mutate: Callable[[Dict[str, Any]], bool]) -> bool:
+        """Load, mutate and save the configuration as one step
+
+        The write lock and the process lock keep other threads and processes
+        out for the whole load -> mutate -> save. 'mutate' returns False when
+        there is nothing to save.
+        """
+        with lock_for(self.config_file).write(), process_lock(self.config_file):
+            config = self.load_config()
+            if not mutate(config):
+                return False
+            return self.save_config(config)
     
-    def load_database(self, db_type: str = "under_development") -> Dict[str, Any]:
-        """Load database from JSON file based on type"""
+    def _db_file(self, db_type: str) -> str:
+        """Database file for a database type (unknown types fall back to under development)"""
         db_files = {
             "under_development": self.standards_db_file,
             "recently_published": self.recently_published_db_file,
             "iso_deleted": self.iso_deleted_db_file
         }
-        
-        db_file = db_files.get(db_type, self.standards_db_file)
+        return db_files.get(db_type, self.standards_db_file)
+
+    def load_database(self, db_type: str = "under_development") -> Dict[str, Any]:
+        """Load database from JSON file based on type"""
+        db_file = self._db_file(db_type)
         
         try:
-            with open(db_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._read_json(db_file)[0]
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error loading database {db_type}: {e}")
             if db_type == "under_development":
@@ -248,21 +301,25 @@ class ConfigManager:
                 self._create_iso_deleted_database()
             return self.load_database(db_type)
     
-    def save_database(self, database: Dict[str, Any], db_type: str = "under_development") -> bool:
-        """Save database to JSON file"""
-        db_files = {
-            "under_development": self.standards_db_file,
-            "recently_published": self.recently_published_db_file,
-            "iso_deleted": self.iso_deleted_db_file
-        }
-        
-        db_file = db_files.get(db_type, self.standards_db_file)
+    def save_database(self, database: Dict[str, Any], db_type: str = "under_development",
+                      expected_version=None) -> bool:
+        """Save database to JSON file
+
+        Pass the RecordTable.version the data was loaded from as
+        'expected_version' to refuse overwriting a newer file.
+        """
+        db_file = self._db_file(db_type)
         
         try:
             database["metadata"]["last_updated"] = datetime.now().isoformat()
-            with open(db_file, 'w', encoding='utf-8') as f:
-                json.dump(database, f, indent=2, ensure_ascii=False)
+            # Duplicate groups are derived data (get_standards_data); never store them
+            database = {k: v for k, v in database.items() if k != "duplicate_groups"}
+            database["metadata"] = {k: v for k, v in database["metadata"].items() if k != "duplicate_groups"}
+            self._write_json(db_file, database, expected_version)
             return True
+        except VersionConflictError as e:
+            print(f"Not saving database {db_type}: {e}")
+            return False
         except Exception as e:
             print(f"Error saving database {db_type}: {e}")
             return False
@@ -276,37 +333,101 @@ class ConfigManager:
     
     def update_committees(self, organization: str, committees: List[str]) -> bool:
         """Update committee list for specified organization"""
-        config = self.load_config()
-        if organization.upper() in config["committees"]:
-            config["committees"][organization.upper()] = committees
-            return self.save_config(config)
-        return False
+        def mutate(config):
+            if organization.upper() in config["committees"]:
+                config["committees"][organization.upper()] = committees
+                return True
+            return False
+        return self._modify_config(mutate)
     
     def add_committee(self, organization: str, committee: str) -> bool:
         """Add a new committee to the list"""
-        config = self.load_config()
-        if organization.upper() in config["committees"]:
-            if committee not in config["committees"][organization.upper()]:
-                config["committees"][organization.upper()].append(committee)
-                return self.save_config(config)
-        return False
+        def mutate(config):
+            if organization.upper() in config["committees"]:
+                if committee not in config["committees"][organization.upper()]:
+                    config["committees"][organization.upper()].append(committee)
+                    return True
+            return False
+        return self._modify_config(mutate)
     
     def remove_committee(self, organization: str, committee: str) -> bool:
         """Remove a committee from the list"""
-        config = self.load_config()
-        if organization.upper() in config["committees"]:
-            if committee in config["committees"][organization.upper()]:
-                config["committees"][organization.upper()].remove(committee)
-                return self.save_config(config)
-        return False
+        def mutate(config):
+            if organization.upper() in config["committees"]:
+                if committee in config["committees"][organization.upper()]:
+                    config["committees"][organization.upper()].remove(committee)
+                    return True
+            return False
+        return self._modify_config(mutate)
     
-    def get_standards_data(self, organization: str = None, db_type: str = "under_development") -> Dict[str, Any]:
-        """Get standards data filtered by organization and database type"""
-        database = self.load_database(db_type)
-        # Normalize structures coming from legacy/alternate JSON exports
-        database = self._normalize_db_structure(database, db_type)
+    def get_standards_data(self, organization: str = None, db_type: str = "under_development",
+                           with_duplicates: bool = True) -> Dict[str, Any]:
+        """Get standards data filtered by organization and database type
+
+        Builds a fresh, mutable dict for every record; callers that only read
+        the records should use get_records() instead.
+        """
+        database = self.get_record_table(db_type).to_database()
+        if with_duplicates:
+            groups = self.get_duplicate_groups(db_type)
+            database["duplicate_groups"] = groups
+            database["metadata"]["duplicate_groups"] = len(groups)
         return database
 
+    def get_records(self, organization: str = None, db_type: str = "under_development") -> List[StandardRecord]:
+        """Records as read-only StandardRecord rows, without building a dict per record
+
+        Use this instead of get_standards_data() when the records are only read;
+        StandardRecord supports attribute access, .get() and to_dict().
+        """
+        return self.get_record_table(db_type).records(organization)
+
+    def get_record_table(self, db_type: str = "under_development") -> RecordTable:
+        """Normalized database as compact records
+
+        Served from memory while the JSON file is unchanged, otherwise from the
+        binary snapshot cache next to it, rebuilding that cache from the JSON
+        when the JSON is newer.
+        """
+        db_file = self._db_file(db_type)
+        cache_file = os.path.splitext(db_file)[0] + ".cache"
+        database = version = None
+        # The stat signature only decides whether the cached table is fresh;
+        # saves compare the content version taken together with the data
+        with lock_for(db_file).read():
+            signature = file_signature(db_file)
+            table = self._table_cache.get(db_type)
+            if table is not None and signature is not None and table.signature == signature:
+                return table
+            table = read_snapshot(cache_file, signature)
+            if table is None:
+                try:
+                    database, version = self._read_json(db_file)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    pass
+
+        if table is None:
+            if database is None:
+                # Reports the problem and recreates the default database
+                database, signature = self.load_database(db_type), None
+            # Normalize structures coming from legacy/alternate JSON exports
+            database = self._normalize_db_structure(database, db_type)
+            table = RecordTable.from_database(database, signature, version)
+            if signature is not None:
+                write_snapshot(cache_file, table)
+        if signature is not None:
+            self._table_cache[db_type] = table
+        return table
+
+    def get_duplicate_groups(self, db_type: str = "under_development") -> List[Dict[str, Any]]:
+        """Linked groups of records describing the same work item (cached per database file)"""
+        table = self.get_record_table(db_type)
+        cached = self._duplicate_cache.get(db_type)
+        if cached is None or table.signature is None or cached[0] != table.signature:
+            cached = (table.signature, find_duplicate_groups(table.records()))
+            self._duplicate_cache[db_type] = cached
+        return copy.deepcopy(cached[1])
+
     # NEW: Keep minimal and self-contained – flattens and harmonizes keys
     def _normalize_db_structure(self, database: Dict[str, Any], db_type: str) -> Dict[str, Any]:
         def flatten_section(section):
@@ -333,21 +454,25 @@ class ConfigManager:
         cen_list = flatten_section(cen)
         iso_list = flatten_section(iso)
 
-        # Harmonize field names (winumber -> wi_number)
+        # Harmonize field names (winumber -> wi_number) on copies, keeping key order
         def fix_record(rec: Dict[str, Any]) -> Dict[str, Any]:
             if isinstance(rec, dict):
                 if "winumber" in rec and "wi_number" not in rec:
-                    rec["wi_number"] = rec.pop("winumber")
+                    return {("wi_number" if k == "winumber" else k): v for k, v in rec.items()}
             return rec
 
         cen_list = [fix_record(r) for r in cen_list]
         iso_list = [fix_record(r) for r in iso_list]
 
+        database = dict(database)
         database["cen_standards"] = cen_list
         database["iso_standards"] = iso_list
+        # Files saved by older versions may still carry stale duplicate groups
+        database.pop("duplicate_groups", None)
 
         # Recalculate metadata counts and ensure numeric type
-        meta = database.setdefault("metadata", {})
+        meta = database["metadata"] = dict(database.get("metadata", {}))
+        meta.pop("duplicate_groups", None)
         meta["total_records"] = len(cen_list) + len(iso_list)
         return database
     
@@ -358,10 +483,12 @@ class ConfigManager:
     
     def update_last_scan(self) -> str:
         """Update the last scan timestamp and return new date"""
-        config = self.load_config()
         new_date = datetime.now().strftime("%d %B %Y")
-        config["settings"]["last_update"] = new_date
-        self.save_config(config)
+
+        def mutate(config):
+            config["settings"]["last_update"] = new_date
+            return True
+        self._modify_config(mutate)
         return new_date
     
     def get_language(self) -> str:
@@ -371,9 +498,10 @@ class ConfigManager:
     
     def set_language(self, language: str) -> bool:
         """Set language preference"""
-        config = self.load_config()
-        config["settings"]["language"] = language
-        return self.save_config(config)
+        def mutate(config):
+            config["settings"]["language"] = language
+            return True
+        return self._modify_config(mutate)
     
     def get_translations(self, language: str = "en") -> Dict[str, str]:
         """Get translations for specified language"""
@@ -439,12 +567,21 @@ class ConfigManager:
         return translations.get(language, translations['en'])
 
 
-# Create and export the global instance
-config_manager = ConfigManager()
+def __getattr__(name):
+    """Create the global instance on first use (from config_manager import config_manager)
+
+    Importing the module for ConfigManager alone (CLI, tests) must not create
+    config/*.json in the working directory.
+    """
+    if name == "config_manager":
+        instance = globals()["config_manager"] = ConfigManager()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Test the config manager
 if __name__ == "__main__":
+    config_manager = ConfigManager()
     print("Testing ConfigManager...")
     print(f"CEN Committees: {len(config_manager.get_committees('CEN'))}")
     print(f"ISO Committees: {len(config_manager.get_committees('ISO'))}")
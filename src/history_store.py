@@ -0,0 +1,367 @@
+# WPSG History Store - per-scan record deltas with periodic full snapshots
+#
+# Layout, one directory per database type:
+#   history/<db_type>/index.json                 scan list + per-record scan index
+#   history/<db_type>/deltas/<scan_id>.json      records added / changed / deleted by a scan
+#   history/<db_type>/snapshots/<scan_id>.json.gz  full record set after a scan
+#
+# The history starts with a base snapshot: the database as the first scan
+# found it (record_baseline), or else the state after that scan. Every later
+# scan that changes something writes a delta. Every 'snapshot_interval'
+# scans a full snapshot is written as well, so rebuilding a database "as of"
+# a date only replays the deltas since the nearest earlier snapshot. The
+# index keeps, per record id, the scans that touched it, so a record timeline
+# only reads those deltas instead of replaying everything.
+import gzip
+import json
+import os
+from datetime import date, datetime, time
+from typing import Dict, List, Any, Optional
+
+from src.utils.data_processor import make_record_id
+from src.utils.locking import lock_for, temp_path
+
+
+Records = Dict[str, Dict[str, Any]]
+
+
+def _record_key(record: Dict[str, Any]) -> str:
+    return record.get("id") or make_record_id(record.get("organization", ""), record.get("reference", ""))
+
+
+def parse_when(when: str, end_of_day: bool = False) -> datetime:
+    """Parse a 'YYYY-MM-DD' date or ISO timestamp, raising ValueError otherwise
+
+    A bare date means the start of that day, or its end with 'end_of_day'.
+    Timestamps with a UTC offset are converted to local time, which is what
+    scans are recorded in.
+    """
+    when = when.strip()
+    if len(when) == 10:
+        day = date.fromisoformat(when)
+        return datetime.combine(day, time.max if end_of_day else time.min)
+    moment = datetime.fromisoformat(when)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def _scan_time(scan: Dict[str, Any]) -> datetime:
+    return parse_when(scan["scanned_at"])
+
+
+def diff_records(previous: Records, current: Records) -> Dict[str, Any]:
+    """Record-level difference between two states"""
+    added = {key: rec for key, rec in current.items() if key not in previous}
+    deleted = [key for key in previous if key not in current]
+    changed = {}
+    for key, rec in current.items():
+        old = previous.get(key)
+        if old is None or old == rec:
+            continue
+        changed[key] = {
+            "set": {k: v for k, v in rec.items() if old.get(k) != v},
+            "unset": [k for k in old if k not in rec],
+        }
+    return {"added": added, "changed": changed, "deleted": deleted}
+
+
+def apply_delta(state: Records, delta: Dict[str, Any]) -> Records:
+    """Apply a delta to a state in place and return it"""
+    for key in delta.get("deleted", []):
+        state.pop(key, None)
+    for key, change in delta.get("changed", {}).items():
+        record = dict(state.get(key, {}))
+        record.update(change.get("set", {}))
+        for field in change.get("unset", []):
+            record.pop(field, None)
+        state[key] = record
+    for key, record in delta.get("added", {}).items():
+        state[key] = dict(record)
+    return state
+
+
+class HistoryStore:
+    """Keeps the scan history of the standards databases"""
+
+    def __init__(self, history_dir: str, snapshot_interval: int = 10):
+        self.history_dir = history_dir
+        self.snapshot_interval = max(1, snapshot_interval)
+
+    # -- files ---------------------------------------------------------------
+
+    def _path(self, db_type: str, *parts: str) -> str:
+        return os.path.join(self.history_dir, db_type, *parts)
+
+    def _read_json(self, path: str) -> Any:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_json(self, path: str, data: Any):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = temp_path(path)
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _load_index(self, db_type: str) -> Dict[str, Any]:
+        try:
+            return self._read_json(self._path(db_type, "index.json"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"scans": [], "records": {}}
+
+    def _save_index(self, db_type: str, index: Dict[str, Any]):
+        self._write_json(self._path(db_type, "index.json"), index)
+
+    def _delta_path(self, db_type: str, scan_id: str) -> str:
+        return self._path(db_type, "deltas", f"{scan_id}.json")
+
+    def _snapshot_path(self, db_type: str, scan_id: str) -> str:
+        return self._path(db_type, "snapshots", f"{scan_id}.json.gz")
+
+    # -- state ---------------------------------------------------------------
+
+    def _state_at(self, db_type: str, index: Dict[str, Any], position: int) -> Records:
+        """Rebuild the record set after scans[position] from the nearest snapshot"""
+        scans = index["scans"]
+        start = position
+        while start >= 0 and not scans[start].get("snapshot"):
+            start -= 1
+
+        state: Records = {}
+        if start >= 0:
+            state = self._read_json(self._snapshot_path(db_type, scans[start]["scan_id"]))
+        for scan in scans[start + 1:position + 1]:
+            apply_delta(state, self._read_json(self._delta_path(db_type, scan["scan_id"])))
+        return state
+
+    def _position_as_of(self, index: Dict[str, Any], when: str) -> int:
+        when = parse_when(when, end_of_day=True)
+        position = -1
+        for i, scan in enumerate(index["scans"]):
+            if _scan_time(scan) <= when:
+                position = i
+        return position
+
+    # -- public API ----------------------------------------------------------
+
+    def scans(self, db_type: str = "under_development") -> List[Dict[str, Any]]:
+        """List recorded scans, oldest first"""
+        return self._load_index(db_type)["scans"]
+
+    def _records_of(self, database: Dict[str, Any]) -> Records:
+        current: Records = {}
+        for section in ("cen_standards", "iso_standards"):
+            for record in database.get(section, []):
+                if isinstance(record, dict):
+                    current[_record_key(record)] = record
+        return current
+
+    def _new_scan_id(self, scans: List[Dict[str, Any]], scanned_at: str) -> str:
+        scan_id = scanned_at.replace("-", "").replace(":", "").replace(".", "")
+        if any(s["scan_id"] == scan_id for s in scans):
+            scan_id = f"{scan_id}_{len(scans)}"
+        return scan_id
+
+    def _add_base(self, db_type: str, index: Dict[str, Any], current: Records,
+                  scanned_at: str, **flags) -> str:
+        """Start the history with a full snapshot and no delta"""
+        scan_id = self._new_scan_id(index["scans"], scanned_at)
+        self._write_json(self._snapshot_path(db_type, scan_id), current)
+        index["scans"].append(dict({"scan_id": scan_id, "scanned_at": scanned_at,
+                                    "delta": False, "snapshot": True}, **flags))
+        for key in current:
+            index["records"].setdefault(key, []).append(scan_id)
+        self._save_index(db_type, index)
+        return scan_id
+
+    def record_baseline(self, database: Dict[str, Any], db_type: str = "under_development") -> Optional[str]:
+        """Store the state a database had before its first recorded scan
+
+        Does nothing once a history exists. The baseline is dated by the
+        database's metadata.last_updated (never later than now), so 'as-of'
+        queries before the first scan still find it.
+        """
+        with lock_for(self._path(db_type, "index.json")).write():
+            index = self._load_index(db_type)
+            if index["scans"]:
+                return None
+            now = datetime.now()
+            scanned_at = now.isoformat()
+            try:
+                last_updated = database.get("metadata", {}).get("last_updated") or ""
+                if parse_when(last_updated) < now:
+                    scanned_at = parse_when(last_updated).isoformat()
+            except (TypeError, ValueError):
+                pass
+            return self._add_base(db_type, index, self._records_of(database), scanned_at, baseline=True)
+
+    def record_scan(self, database: Dict[str, Any], db_type: str = "under_development",
+                    scanned_at: str = None) -> Optional[str]:
+        """Store the state of a database after a scan, returns the scan id or None if unchanged"""
+        with lock_for(self._path(db_type, "index.json")).write():
+            index = self._load_index(db_type)
+            scans = index["scans"]
+            previous = self._state_at(db_type, index, len(scans) - 1) if scans else {}
+            current = self._records_of(database)
+
+            delta = diff_records(previous, current)
+            if not (delta["added"] or delta["changed"] or delta["deleted"]):
+                return None
+
+            scanned_at = scanned_at or datetime.now().isoformat()
+            if not scans:
+                # Without a baseline the first state is the base; its delta would just repeat the snapshot
+                return self._add_base(db_type, index, current, scanned_at)
+
+            scan_id = self._new_scan_id(scans, scanned_at)
+            since_snapshot = 0
+            for scan in reversed(scans):
+                if scan.get("snapshot"):
+                    break
+                since_snapshot += 1
+            take_snapshot = since_snapshot + 1 >= self.snapshot_interval
+
+            delta.update(scan_id=scan_id, scanned_at=scanned_at)
+            self._write_json(self._delta_path(db_type, scan_id), delta)
+            if take_snapshot:
+                self._write_json(self._snapshot_path(db_type, scan_id), current)
+
+            scans.append({"scan_id": scan_id, "scanned_at": scanned_at,
+                          "delta": True, "snapshot": take_snapshot})
+            touched = list(delta["added"]) + list(delta["changed"]) + delta["deleted"]
+            for key in touched:
+                index["records"].setdefault(key, []).append(scan_id)
+            self._save_index(db_type, index)
+            return scan_id
+
+    def database_as_of(self, when: str, db_type: str = "under_development") -> Optional[Dict[str, Any]]:
+        """Rebuild a database as it was after the last scan on or before 'when'
+
+        Raises ValueError if 'when' is not a date or ISO timestamp.
+        """
+        parse_when(when)
+        with lock_for(self._path(db_type, "index.json")).read():
+            index = self._load_index(db_type)
+            position = self._position_as_of(index, when)
+            if position < 0:
+                return None
+
+            scan = index["scans"][position]
+            records = list(self._state_at(db_type, index, position).values())
+            cen = [r for r in records if r.get("organization") == "CEN"]
+            iso = [r for r in records if r.get("organization") != "CEN"]
+            return {
+                "metadata": {
+                    "last_updated": scan["scanned_at"],
+                    "source": "NVC WPSG Automation Tool - History",
+                    "version": "1.0",
+                    "total_records": len(records),
+                    "as_of": when,
+                    "scan_id": scan["scan_id"],
+                },
+                "cen_standards": cen,
+                "iso_standards": iso,
+            }
+
+    def db_types(self) -> List[str]:
+        """Database types that have a history"""
+        try:
+            names = os.listdir(self.history_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(n for n in names if os.path.isfile(self._path(n, "index.json")))
+
+    def timeline(self, record_id: str, db_type: str = None) -> List[Dict[str, Any]]:
+        """Every recorded change of one record, oldest first
+
+        Without 'db_type' the histories of all databases are merged by scan
+        time, so a standard moving from under development to recently
+        published shows up as a deletion in one database and an addition in
+        the other. Every event names its 'db_type'.
+        """
+        events = []
+        for name in [db_type] if db_type else self.db_types():
+            events.extend(dict(event, db_type=name) for event in self._timeline(record_id, name))
+        events.sort(key=lambda event: parse_when(event["scanned_at"]))
+        return events
+
+    def _timeline(self, record_id: str, db_type: str) -> List[Dict[str, Any]]:
+        with lock_for(self._path(db_type, "index.json")).read():
+            index = self._load_index(db_type)
+            scans = {s["scan_id"]: s for s in index["scans"]}
+            events = []
+            record = None
+            for scan_id in index["records"].get(record_id, []):
+                scan = scans[scan_id]
+                if not scan.get("delta"):
+                    # Base entry (baseline, first scan or compaction): the record is only in the snapshot
+                    record = self._read_json(self._snapshot_path(db_type, scan_id)).get(record_id)
+                    events.append({"scan_id": scan_id, "scanned_at": scan["scanned_at"],
+                                   "change": "snapshot", "record": record})
+                    continue
+
+                delta = self._read_json(self._delta_path(db_type, scan_id))
+                event = {"scan_id": scan_id, "scanned_at": scan["scanned_at"]}
+                if record_id in delta["added"]:
+                    record = dict(delta["added"][record_id])
+                    event.update(change="added", record=record)
+                elif record_id in delta["changed"]:
+                    change = delta["changed"][record_id]
+                    record = dict(record or {}, **change["set"])
+                    for field in change["unset"]:
+                        record.pop(field, None)
+                    event.update(change="changed", fields=change["set"], removed=change["unset"],
+                                 record=record)
+                else:
+                    record = None
+                    event.update(change="deleted", record=None)
+                events.append(event)
+            return events
+
+    def compact(self, before: str, db_type: str = "under_development") -> int:
+        """Fold all scans before 'before' into one base snapshot, returns the number of scans removed
+
+        Raises ValueError if 'before' is not a date or ISO timestamp.
+        """
+        cutoff = parse_when(before)
+        with lock_for(self._path(db_type, "index.json")).write():
+            index = self._load_index(db_type)
+            scans = index["scans"]
+            position = -1
+            for i, scan in enumerate(scans):
+                if _scan_time(scan) < cutoff:
+                    position = i
+            if position < 1:
+                return 0
+
+            base = scans[position]
+            state = self._state_at(db_type, index, position)
+            self._write_json(self._snapshot_path(db_type, base["scan_id"]), state)
+
+            folded = {s["scan_id"] for s in scans[:position]}
+            for scan in scans[:position + 1]:
+                self._remove(self._delta_path(db_type, scan["scan_id"]))
+                if scan["scan_id"] in folded and scan.get("snapshot"):
+                    self._remove(self._snapshot_path(db_type, scan["scan_id"]))
+
+            base_id = base["scan_id"]
+            records = {}
+            for key, scan_ids in index["records"].items():
+                kept = [s for s in scan_ids if s not in folded and s != base_id]
+                if key in state:
+                    kept.insert(0, base_id)
+                if kept:
+                    records[key] = kept
+            index["records"] = records
+            index["scans"] = [dict(base, delta=False, snapshot=True)] + scans[position + 1:]
+            self._save_index(db_type, index)
+            return len(folded)
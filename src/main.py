@@ -0,0 +1,261 @@
+# WPSG Headless CLI - scans, migrations, exports and assessments without the eel UI
+#
+# Run from the project directory (same as wpsg_app.py), e.g. from cron:
+#   cd /opt/wpsg-automation && python -m src.main scan --source data/input
+#
+# Every command writes one JSON object per line to stdout ('event' plus fields);
+# diagnostic prints from the rest of the code base are sent to stderr so the
+# stdout stream stays machine readable.
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+from typing import List
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_manager import ConfigManager
+from src.history_store import HistoryStore, parse_when
+from src.scan_pipeline import ScanPipeline, fixture_jobs, run_scan
+from src.utils.ai_classifier import assess_committee
+
+
+# Exit status codes
+EXIT_OK = 0
+EXIT_FAILURE = 1        # command could not run
+EXIT_USAGE = 2          # bad arguments (argparse uses 2 as well)
+EXIT_PARTIAL = 3        # command finished but some items failed
+
+DB_TYPES = ("under_development", "recently_published", "iso_deleted")
+
+_stdout = sys.stdout
+
+
+def emit(event: str, **fields):
+    """Write one JSON-lines event to stdout"""
+    line = {'event': event, 'time': datetime.now().isoformat(timespec='seconds')}
+    line.update(fields)
+    _stdout.write(json.dumps(line, ensure_ascii=False) + "\n")
+    _stdout.flush()
+
+
+def cmd_status(manager: ConfigManager, args) -> int:
+    config = manager.load_config()
+    databases = {}
+    for db_type in DB_TYPES:
+        databases[db_type] = len(manager.get_record_table(db_type))
+    emit('status',
+         last_update=config['settings'].get('last_update'),
+         language=config['settings'].get('language', 'en'),
+         committees={org: len(c) for org, c in config['committees'].items()},
+         databases=databases)
+    return EXIT_OK
+
+
+def cmd_scan(manager: ConfigManager, args) -> int:
+    if not args.source:
+        emit('error', message="No live scan sources are available yet; "
+                              "pass --source with a directory of recorded payloads")
+        return EXIT_FAILURE
+    if not os.path.isdir(args.source):
+        emit('error', message=f"Source directory not found: {args.source}")
+        return EXIT_FAILURE
+
+    jobs = fixture_jobs(args.source)
+    emit('scan_started', db_type=args.db_type, jobs=len(jobs))
+    pipeline = ScanPipeline(io_workers=args.io_workers, parse_workers=args.parse_workers)
+    result = run_scan(manager, jobs, args.db_type, pipeline,
+                      progress=lambda stats: emit('scan_progress', **stats))
+
+    last_update = manager.update_last_scan() if result['success'] else None
+    emit('scan_finished', last_update=last_update, **result)
+    return EXIT_OK if result['success'] else EXIT_PARTIAL
+
+
+def cmd_migrate(manager: ConfigManager, args) -> int:
+    failed = 0
+    for db_type in args.db_type or DB_TYPES:
+        before = json.dumps(manager.load_database(db_type), sort_keys=True)
+        # The record table flattens nested sections and renames legacy fields
+        table = manager.get_record_table(db_type)
+        database = table.to_database()
+        changed = json.dumps(database, sort_keys=True) != before
+
+        saved = True
+        if changed and not args.dry_run:
+            # Refused if a scan committed since the table was loaded
+            saved = manager.save_database(database, db_type, expected_version=table.version)
+            failed += not saved
+        emit('migrated', db_type=db_type, changed=changed, saved=saved and not args.dry_run and changed,
+             total_records=database['metadata']['total_records'])
+    return EXIT_PARTIAL if failed else EXIT_OK
+
+
+def cmd_export(manager: ConfigManager, args) -> int:
+    records = manager.get_records(args.organization, args.db_type)
+    if args.collapse_duplicates:
+        # Keep the primary record of every duplicate group
+        groups = manager.get_duplicate_groups(args.db_type)
+        hidden = {m for g in groups for m in g["members"] if m != g["primary"]}
+        records = [r for r in records if r.id not in hidden]
+    # Only the exported rows are turned into dicts
+    records = [r.to_dict() for r in records]
+
+    output = args.output or os.path.join(
+        "data", "output", f"{args.db_type}_{datetime.now().strftime('%Y%m%d')}.{args.format}")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    try:
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            if args.format == "json":
+                json.dump(records, f, indent=2, ensure_ascii=False)
+            else:
+                fieldnames = []
+                for record in records:
+                    fieldnames.extend(k for k in record if k not in fieldnames)
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(records)
+    except OSError as e:
+        emit('error', message=f"Export failed: {e}")
+        return EXIT_FAILURE
+
+    emit('exported', db_type=args.db_type, format=args.format, output=output, records=len(records))
+    return EXIT_OK
+
+
+def cmd_assess(manager: ConfigManager, args) -> int:
+    names = args.committees
+    if not names:
+        organizations = [args.organization.upper()] if args.organization else ["CEN", "ISO"]
+        names = [c for org in organizations for c in manager.get_committees(org)]
+
+    failed = 0
+    for name in names:
+        try:
+            result = assess_committee(name, args.url)
+        except Exception as e:
+            failed += 1
+            emit('assessment', committee_name=name, success=False, message=str(e))
+            continue
+        emit('assessment', **result)
+    emit('assess_finished', assessed=len(names) - failed, failed=failed)
+    return EXIT_PARTIAL if failed else EXIT_OK
+
+
+def cmd_history(manager: ConfigManager, args) -> int:
+    history = HistoryStore(os.path.join(manager.config_dir, "history"))
+
+    if args.action != "timeline":
+        args.db_type = args.db_type or "under_development"
+
+    if args.action == "list":
+        for scan in history.scans(args.db_type):
+            emit('scan', db_type=args.db_type, **scan)
+        return EXIT_OK
+
+    if not args.target:
+        emit('error', message=f"history {args.action} needs a date or record id")
+        return EXIT_USAGE
+    if args.action in ("as-of", "compact"):
+        # Checked before anything is read or folded: compact can't be undone
+        try:
+            parse_when(args.target)
+        except ValueError:
+            emit('error', message=f"Not a date (YYYY-MM-DD) or ISO timestamp: {args.target}")
+            return EXIT_USAGE
+
+    if args.action == "timeline":
+        # Without --db-type the record is followed across all databases
+        events = history.timeline(args.target, args.db_type)
+        for event in events:
+            emit('record_change', id=args.target, **event)
+        if not events:
+            emit('error', message=f"No history for record: {args.target}")
+            return EXIT_FAILURE
+        return EXIT_OK
+
+    if args.action == "compact":
+        removed = history.compact(args.target, args.db_type)
+        emit('compacted', db_type=args.db_type, before=args.target, scans_removed=removed)
+        return EXIT_OK
+
+    # as-of
+    database = history.database_as_of(args.target, args.db_type)
+    if database is None:
+        emit('error', message=f"No scan recorded on or before {args.target}")
+        return EXIT_FAILURE
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(database, f, indent=2, ensure_ascii=False)
+    emit('as_of', db_type=args.db_type, output=args.output, **database['metadata'])
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="wpsg", description="WPSG Automation Tool - headless mode")
+    parser.add_argument("--config-dir", default="config", help="directory with the JSON config and databases")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    status = commands.add_parser("status", help="show last scan date and database sizes")
+    status.set_defaults(handler=cmd_status)
+
+    scan = commands.add_parser("scan", help="scan sources and update a database")
+    scan.add_argument("--source", help="directory of recorded payloads (<org>_<name>.html/.json)")
+    scan.add_argument("--db-type", choices=DB_TYPES, default="under_development")
+    scan.add_argument("--io-workers", type=int, default=8)
+    scan.add_argument("--parse-workers", type=int, default=None)
+    scan.set_defaults(handler=cmd_scan)
+
+    migrate = commands.add_parser("migrate", help="rewrite databases in the normalized structure")
+    migrate.add_argument("--db-type", choices=DB_TYPES, action="append")
+    migrate.add_argument("--dry-run", action="store_true")
+    migrate.set_defaults(handler=cmd_migrate)
+
+    export = commands.add_parser("export", help="export a database to CSV or JSON")
+    export.add_argument("--db-type", choices=DB_TYPES, default="under_development")
+    export.add_argument("--format", choices=("csv", "json"), default="csv")
+    export.add_argument("--organization", choices=("CEN", "ISO", "cen", "iso"))
+    export.add_argument("--collapse-duplicates", action="store_true",
+                        help="export only the primary record of each duplicate/adoption group")
+    export.add_argument("--output", help="output file (default: data/output/<db_type>_<date>.<format>)")
+    export.set_defaults(handler=cmd_export)
+
+    assess = commands.add_parser("assess", help="run the relevance assessment for committees")
+    assess.add_argument("committees", nargs="*", help="committee names (default: all configured)")
+    assess.add_argument("--organization", choices=("CEN", "ISO", "cen", "iso"))
+    assess.add_argument("--url", default="", help="committee URL passed to the assessment")
+    assess.set_defaults(handler=cmd_assess)
+
+    history = commands.add_parser("history", help="query or compact the scan history")
+    history.add_argument("action", choices=("list", "as-of", "timeline", "compact"))
+    history.add_argument("target", nargs="?", default="",
+                         help="date for as-of/compact (YYYY-MM-DD or ISO timestamp), record id for timeline")
+    history.add_argument("--db-type", choices=DB_TYPES,
+                         help="database (default: under_development; timeline: all databases)")
+    history.add_argument("--output", help="as-of: write the rebuilt database to this file")
+    history.set_defaults(handler=cmd_history)
+
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    global _stdout
+    args = build_parser().parse_args(argv)
+    _stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            manager = ConfigManager(args.config_dir)
+            return args.handler(manager, args)
+        except Exception as e:
+            emit('error', command=args.command, message=str(e))
+            return EXIT_FAILURE
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# WPSG Scan Pipeline - network I/O threads feeding a process-pool parsing stage
+#
+#   fetch jobs (threads) --> bounded queue --> parse_payload (processes) --> DatabaseWriter
+#
+# Fetch jobs are plain callables returning one payload dict or a list of them
+# (see src.utils.data_processor.parse_payload for the payload shape). They run
+# in threads because they spend their time waiting on the network. Parsing is
+# CPU bound, so it runs in a ProcessPoolExecutor to get past the GIL. The queue
+# between the two stages is bounded: when the parsers fall behind, fetchers
+# block on put() instead of piling raw pages up in memory.
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Any
+
+from src.history_store import HistoryStore
+from src.utils.data_processor import parse_payload
+
+
+FetchJob = Callable[[], Any]
+
+_DONE = object()
+
+
+def parse_context():
+    """Start method for the parse processes
+
+    Never plain fork: the fetch threads (and, in the app, eel's) are already
+    running, and a forked child can inherit a lock one of them was holding.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ScanPipeline:
+    """Runs fetch jobs concurrently and streams back parsed records"""
+
+    def __init__(self, io_workers: int = 8, parse_workers: int = None, queue_size: int = 32):
+        self.io_workers = max(1, io_workers)
+        self.parse_workers = max(1, parse_workers or os.cpu_count() or 1)
+        self.queue_size = max(1, queue_size)
+        self.stats = {}
+        self.errors: List[str] = []
+
+    def run(self, jobs: Iterable[FetchJob]) -> Iterator[Dict[str, Any]]:
+        """Yield normalized records as soon as their payload has been parsed"""
+        jobs = list(jobs)
+        raw_queue = queue.Queue(maxsize=self.queue_size)
+        self.errors = []
+        self.stats = {'jobs': len(jobs), 'payloads': 0, 'records': 0, 'errors': 0}
+        started = time.perf_counter()
+
+        # Set when the consumer stops early, so blocked fetchers give up
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    raw_queue.put(item, timeout=0.1)  # blocks while the parsers catch up
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def fetch(job):
+            if stop.is_set():
+                return
+            try:
+                result = job()
+            except Exception as e:
+                self._error(f"Fetch failed: {e}")
+                return
+            payloads = result if isinstance(result, list) else [result]
+            for payload in payloads:
+                if payload and not put(payload):
+                    return
+
+        def feed():
+            with ThreadPoolExecutor(max_workers=self.io_workers) as io_pool:
+                list(io_pool.map(fetch, jobs))
+            put(_DONE)
+
+        feeder = threading.Thread(target=feed, name="scan-io", daemon=True)
+        feeder.start()
+
+        # Never hold more parsed-but-unread work than the queue would
+        max_in_flight = self.parse_workers + self.queue_size
+        parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=parse_context())
+        pending = set()
+        try:
+            finished = False
+            while not finished or pending:
+                if not finished and len(pending) < max_in_flight:
+                    try:
+                        payload = raw_queue.get(timeout=0.05 if pending else None)
+                    except queue.Empty:
+                        payload = None
+                    if payload is _DONE:
+                        finished = True
+                    elif payload is not None:
+                        self.stats['payloads'] += 1
+                        pending.add(parse_pool.submit(parse_payload, payload))
+
+                if pending:
+                    timeout = 0 if not finished and len(pending) < max_in_flight else None
+                    done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            records = future.result()
+                        except Exception as e:
+                            self._error(f"Parse failed: {e}")
+                            continue
+                        self.stats['records'] += len(records)
+                        yield from records
+        finally:
+            # Closed early or the consumer raised: unblock the fetchers and
+            # drop queued work, otherwise the I/O threads never finish
+            stop.set()
+            for future in pending:
+                future.cancel()
+            parse_pool.shutdown(wait=True)
+            while feeder.is_alive():
+                try:
+                    raw_queue.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            feeder.join()
+        self.stats['duration'] = round(time.perf_counter() - started, 3)
+
+    def _error(self, message: str):
+        print(message)
+        self.errors.append(message)
+        self.stats['errors'] = len(self.errors)
+
+
+class DatabaseWriter:
+    """Merges streamed records into a database and saves it once on commit"""
+
+    def __init__(self, config_manager, db_type: str = "under_development"):
+        self.config_manager = config_manager
+        self.db_type = db_type
+        self.added = 0
+        self.updated = 0
+        self._changed_records: List[Dict[str, Any]] = []
+        self._load()
+
+    def _load(self):
+        table = self.config_manager.get_record_table(self.db_type)
+        self.database = table.to_database()
+        self.version = table.version
+        self._index = {}
+        for section in ("cen_standards", "iso_standards"):
+            for pos, record in enumerate(self.database.setdefault(section, [])):
+                if isinstance(record, dict) and record.get("id"):
+                    self._index[record["id"]] = (section, pos)
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        """Insert or update one record, returns True if anything changed"""
+        changed = self._merge(record)
+        if changed:
+            self._changed_records.append(record)
+        return changed
+
+    def _merge(self, record: Dict[str, Any]) -> bool:
+        section = "cen_standards" if record.get("organization") == "CEN" else "iso_standards"
+        location = self._index.get(record["id"])
+        if location is None:
+            self.database[section].append(dict(record))
+            self._index[record["id"]] = (section, len(self.database[section]) - 1)
+            self.added += 1
+            return True
+
+        existing = self.database[location[0]][location[1]]
+        # Fields the source left empty keep their stored value
+        changed = {k: v for k, v in record.items()
+                   if k != "last_updated" and v not in ("", None) and existing.get(k) != v}
+        if not changed:
+            return False
+        existing.update(changed)
+        existing["last_updated"] = record.get("last_updated", datetime.now().isoformat())
+        self.updated += 1
+        return True
+
+    @property
+    def changes(self) -> int:
+        return self.added + self.updated
+
+    def commit(self, retries: int = 3) -> bool:
+        """Save the merged database if any record changed
+
+        The save only goes through if the file is still the version the scan
+        started from; if someone saved in between, the scan's changes are
+        merged into the fresh file and the save is retried.
+        """
+        if not self.changes:
+            return True
+        for attempt in range(retries):
+            if attempt:
+                records, self._changed_records = self._changed_records, []
+                self.added = self.updated = 0
+                self._load()
+                for record in records:
+                    self.add(record)
+                if not self.changes:
+                    return True
+            meta = self.database.setdefault("metadata", {})
+            meta["total_records"] = len(self.database["cen_standards"]) + len(self.database["iso_standards"])
+            if self.config_manager.save_database(self.database, self.db_type, expected_version=self.version):
+                return True
+        return False
+
+
+def run_scan(config_manager, jobs: Iterable[FetchJob], db_type: str = "under_development",
+             pipeline: ScanPipeline = None,
+             progress: Callable[[Dict[str, Any]], None] = None,
+             progress_every: int = 500,
+             history: HistoryStore = None) -> Dict[str, Any]:
+    """Run a full scan: fetch, parse and write the results into the database
+
+    'progress' is called with a snapshot of the pipeline stats every
+    'progress_every' records. Changed databases are also recorded in the
+    scan history (<config_dir>/history unless 'history' is given).
+    """
+    pipeline = pipeline or ScanPipeline()
+    history = history or HistoryStore(os.path.join(config_manager.config_dir, "history"))
+    writer = DatabaseWriter(config_manager, db_type)
+    # The database as this scan found it, if the history has nothing yet
+    history.record_baseline(writer.database, db_type)
+    for count, record in enumerate(pipeline.run(jobs), 1):
+        writer.add(record)
+        if progress and count % progress_every == 0:
+            progress(dict(pipeline.stats, changes_found=writer.changes))
+    saved = writer.commit()
+
+    scan_id = None
+    if saved and writer.changes:
+        scan_id = history.record_scan(writer.database, db_type)
+
+    return {
+        'success': saved and not pipeline.errors,
+        'db_type': db_type,
+        'changes_found': writer.changes,
+        'added': writer.added,
+        'updated': writer.updated,
+        'scan_id': scan_id,
+        'errors': pipeline.errors,
+        'stats': pipeline.stats,
+    }
+
+
+def fixture_jobs(fixture_dir: str, repeat: int = 1, latency: float = 0.0) -> List[FetchJob]:
+    """Build fetch jobs that replay recorded payloads from disk
+
+    Files are named '<organization>_<anything>.html' or '.json'. 'latency'
+    adds a sleep per fetch to stand in for the network round trip.
+    """
+    jobs = []
+    for name in sorted(os.listdir(fixture_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext not in (".html", ".json"):
+            continue
+        path = os.path.join(fixture_dir, name)
+        organization = stem.split("_", 1)[0].upper()
+
+        def job(path=path, organization=organization, fmt=ext[1:]):
+            if latency:
+                time.sleep(latency)
+            with open(path, 'r', encoding='utf-8') as f:
+                return {'organization': organization, 'format': fmt, 'body': f.read()}
+
+        jobs.extend([job] * repeat)
+    return jobs
+
+
+def benchmark(fixture_dir: str, worker_counts: Iterable[int] = None, repeat: int = 50,
+              latency: float = 0.0) -> List[Dict[str, Any]]:
+    """Time the pipeline on recorded fixtures for several parse worker counts"""
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({1, max(1, cpus // 2), cpus})
+
+    results = []
+    for workers in worker_counts:
+        pipeline = ScanPipeline(parse_workers=workers)
+        records = sum(1 for _ in pipeline.run(fixture_jobs(fixture_dir, repeat, latency)))
+        duration = pipeline.stats['duration']
+        results.append({
+            'parse_workers': workers,
+            'payloads': pipeline.stats['payloads'],
+            'records': records,
+            'duration': duration,
+            'records_per_second': round(records / duration) if duration else 0,
+        })
+    return results
+
+
+# Benchmark the pipeline on the recorded fixtures
+if __name__ == "__main__":
+    fixtures = sys.argv[1] if len(sys.argv) > 1 else os.path.join("tests", "fixtures", "scans")
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"Benchmarking scan pipeline on {fixtures} (x{repeat})...")
+    for row in benchmark(fixtures, repeat=repeat):
+        print(f"  {row['parse_workers']:>3} parse workers: {row['records']} records "
+              f"from {row['payloads']} payloads in {row['duration']}s "
+              f"({row['records_per_second']} records/s)")
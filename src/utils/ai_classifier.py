@@ -0,0 +1,55 @@
+# WPSG AI Classifier - committee relevance assessment
+from typing import Dict, Any
+
+
+# Simple keyword-based assessment for demo
+PACKAGING_KEYWORDS = [
+    'packaging', 'pack', 'container', 'bottle', 'box', 'bag', 'wrap',
+    'label', 'recyclable', 'biodegradable', 'plastic', 'paper', 'board',
+    'food contact', 'barrier', 'sterilization', 'medical device'
+]
+
+
+def assess_committee(committee_name: str, committee_url: str = '') -> Dict[str, Any]:
+    """Score how relevant a committee is to packaging standards"""
+    found_keywords = []
+    text_to_check = (committee_name + ' ' + committee_url).lower()
+
+    for keyword in PACKAGING_KEYWORDS:
+        if keyword in text_to_check:
+            found_keywords.append(keyword)
+
+    # Calculate relevance score
+    base_score = min(len(found_keywords) * 15, 80)
+
+    # Boost score for specific committees
+    if 'tc 261' in text_to_check or 'tc 122' in text_to_check:
+        base_score += 20
+    if 'packaging' in text_to_check:
+        base_score += 15
+
+    relevance_score = min(base_score, 100)
+
+    # Generate assessment text
+    if relevance_score > 70:
+        assessment = "Highly relevant to packaging standards"
+        recommendation = "Strongly recommend including in monitoring"
+        confidence = "High"
+    elif relevance_score > 30:
+        assessment = "Moderately relevant to packaging"
+        recommendation = "Consider including with regular review"
+        confidence = "Medium"
+    else:
+        assessment = "Limited relevance to packaging standards"
+        recommendation = "Low priority for packaging focus"
+        confidence = "Medium"
+
+    return {
+        'success': True,
+        'relevance_score': relevance_score,
+        'assessment': assessment,
+        'recommendation': recommendation,
+        'keywords_found': found_keywords,
+        'confidence': confidence,
+        'committee_name': committee_name
+    }
@@ -0,0 +1,180 @@
+# WPSG Data Processor - parsing and normalization of raw scan payloads
+#
+# Everything in this module runs inside the parsing worker processes of the
+# scan pipeline, so it must stay importable on its own (no eel, no
+# ConfigManager) and only work with plain, picklable values.
+import json
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Dict, List, Any, Optional
+
+
+# Column headers found in CEN/ISO work programme tables -> record field
+HTML_COLUMN_MAP = {
+    "reference": "reference",
+    "project reference": "reference",
+    "standard reference": "reference",
+    "title": "title",
+    "committee": "committee",
+    "technical body": "committee",
+    "tc": "committee",
+    "wi": "wi_number",
+    "wi number": "wi_number",
+    "work item": "wi_number",
+    "category": "category",
+    "publication date": "publication_date",
+    "date of publication": "publication_date",
+    "withdrawal date": "deletion_date",
+    "status": "status",
+}
+
+# Alternate JSON keys used by the APIs -> record field
+JSON_FIELD_MAP = {
+    "ref": "reference",
+    "reference": "reference",
+    "deliverable": "reference",
+    "title": "title",
+    "title_en": "title",
+    "committee": "committee",
+    "tc": "committee",
+    "owner_committee": "committee",
+    "wi_number": "wi_number",
+    "winumber": "wi_number",
+    "work_item": "wi_number",
+    "category": "category",
+    "publication_date": "publication_date",
+    "published": "publication_date",
+    "deletion_date": "deletion_date",
+    "withdrawn": "deletion_date",
+    "status": "status",
+}
+
+
+class _TableParser(HTMLParser):
+    """Collects the rows of every <table> in a page as lists of cell texts"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[str]] = []
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._row is not None and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if self._row:
+                self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def make_record_id(organization: str, reference: str) -> str:
+    """Build the record id used in the databases, e.g. 'cen_en_1034_6_2005_a1_2009'"""
+    slug = re.sub(r"[^a-z0-9=]+", "_", reference.lower()).strip("_")
+    return f"{organization.lower()}_{slug}"
+
+
+def normalize_record(raw: Dict[str, Any], organization: str,
+                     committee: str = "", scanned_at: str = None) -> Optional[Dict[str, Any]]:
+    """Turn a raw field dict into the database record shape, or None if unusable"""
+    reference = " ".join(str(raw.get("reference", "")).split())
+    if not reference:
+        return None
+
+    organization = organization.upper()
+    record = {
+        "id": make_record_id(organization, reference),
+        "reference": reference,
+        "title": " ".join(str(raw.get("title", "")).split()),
+        "committee": " ".join(str(raw.get("committee") or committee).split()),
+        "wi_number": str(raw.get("wi_number", "")).strip(),
+        "organization": organization,
+        "category": str(raw.get("category", "")).strip().lower().replace(" ", "_"),
+        "last_updated": scanned_at or datetime.now().isoformat(),
+    }
+    # Dataset specific fields are only kept when the source provides them
+    for key in ("publication_date", "deletion_date", "status"):
+        if raw.get(key):
+            record[key] = str(raw[key]).strip()
+    return record
+
+
+def parse_html_table(body: str) -> List[Dict[str, str]]:
+    """Extract raw field dicts from the first table with a recognisable header row"""
+    parser = _TableParser()
+    parser.feed(body)
+    parser.close()
+
+    columns = None
+    rows = []
+    for cells in parser.rows:
+        if columns is None:
+            mapped = [HTML_COLUMN_MAP.get(c.strip().lower().rstrip(":")) for c in cells]
+            if "reference" in mapped:
+                columns = mapped
+            continue
+        rows.append({field: value for field, value in zip(columns, cells) if field})
+    return rows
+
+
+def parse_json_body(body: str) -> List[Dict[str, Any]]:
+    """Extract raw field dicts from an API response body"""
+    data = json.loads(body)
+    if isinstance(data, dict):
+        for key in ("results", "records", "items", "data", "standards"):
+            if isinstance(data.get(key), list):
+                data = data[key]
+                break
+        else:
+            data = [data]
+
+    rows = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        row = {}
+        for key, value in item.items():
+            field = JSON_FIELD_MAP.get(key.lower())
+            if field and field not in row and value not in (None, ""):
+                row[field] = value
+        rows.append(row)
+    return rows
+
+
+def parse_payload(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Parse one raw payload into normalized database records
+
+    A payload is a plain dict produced by a scraper or API client:
+        {'organization': 'CEN', 'format': 'html' | 'json', 'body': str,
+         'committee': optional default committee, 'scanned_at': optional ISO timestamp}
+    """
+    fmt = payload.get("format", "json").lower()
+    if fmt == "html":
+        rows = parse_html_table(payload["body"])
+    elif fmt == "json":
+        rows = parse_json_body(payload["body"])
+    else:
+        raise ValueError(f"Unknown payload format: {fmt}")
+
+    organization = payload.get("organization", "")
+    committee = payload.get("committee", "")
+    scanned_at = payload.get("scanned_at")
+
+    records = []
+    for row in rows:
+        record = normalize_record(row, organization, committee, scanned_at)
+        if record is not None:
+            records.append(record)
+    return records
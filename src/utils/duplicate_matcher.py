@@ -0,0 +1,226 @@
+# WPSG Duplicate Matcher - links the same work item across CEN and ISO lists
+#
+# Comparing every record with every other one is O(n^2). Records are first
+# put into blocks (same base reference number, shared title word pairs) and
+# only pairs that share a block are scored. Matches are then merged into
+# groups with a union-find, so 'EN ISO 11607-1', 'ISO 11607-1:2019' and its
+# amendment end up in one group.
+import re
+from itertools import combinations
+from typing import Dict, List, Any, Iterable, Mapping, Optional, Set, Tuple
+
+
+BODY_PREFIXES = {"EN", "PREN", "FPREN", "CEN", "CLC", "ISO", "IEC"}
+
+TITLE_STOPWORDS = {
+    "and", "for", "the", "of", "in", "on", "to", "with", "by", "from", "or", "a", "an",
+    "part", "general", "requirements", "method", "methods", "determination",
+}
+
+_NUMBER_RE = re.compile(r"(?<![\w=/])(\d{2,6})((?:-\d+)*)(?::(\d{4}))?")
+_AMENDMENT_RE = re.compile(r"(?:\+|/)\s*(A\d+|AC|AMD\s*\d+)\s*:\s*(\d{4})")
+_PART_RE = re.compile(r"\bpart\s+(\w+(?:-\w+)*)\s*:")
+_BODY_RE = re.compile(r"[A-Z]+")
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_reference(reference: str) -> Dict[str, Any]:
+    """Split a reference like 'EN ISO 1034-6:2005+A1:2009' into its parts
+
+    'key' is the base number plus all part levels ('1034-6', '60335-2-15') and
+    is None for references without a document number (e.g. 'EN WI=00172215').
+    """
+    ref = " ".join(reference.upper().replace("–", "-").replace("—", "-").split())
+    match = _NUMBER_RE.search(ref)
+    if not match:
+        return {"bodies": [], "number": None, "part": None, "year": None,
+                "amendments": [], "key": None}
+
+    bodies = [w for w in _BODY_RE.findall(ref[:match.start()]) if w in BODY_PREFIXES]
+    bodies = ["EN" if b in ("PREN", "FPREN", "CEN") else b for b in bodies]
+    number, part, year = match.groups()
+    part = part.lstrip("-") or None
+    return {
+        "bodies": sorted(set(bodies)),
+        "number": number.lstrip("0") or "0",
+        "part": part,
+        "year": year,
+        "amendments": [f"{a.replace(' ', '')}:{y}" for a, y in _AMENDMENT_RE.findall(ref)],
+        "key": f"{number.lstrip('0') or '0'}-{part}" if part else number.lstrip("0") or "0",
+    }
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(_NON_ALNUM_RE.sub(" ", title.lower()).split())
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    text = f"  {normalized} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def title_trigrams(title: str) -> Set[str]:
+    return _trigrams(normalize_title(title))
+
+
+def title_similarity(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class BlockingIndex:
+    """Maps block keys to record positions and yields candidate pairs"""
+
+    def __init__(self, max_block_size: int = 100):
+        self.max_block_size = max_block_size
+        self.blocks: Dict[str, List[int]] = {}
+
+    def add(self, key: str, position: int):
+        self.blocks.setdefault(key, []).append(position)
+
+    def candidate_pairs(self) -> Set[Tuple[int, int]]:
+        """Pairs sharing at least one block; oversized blocks are too generic to use"""
+        pairs = set()
+        for members in self.blocks.values():
+            if 1 < len(members) <= self.max_block_size:
+                pairs.update(combinations(sorted(set(members)), 2))
+        return pairs
+
+
+def _title_blocks(normalized: str) -> Iterable[str]:
+    words = [w for w in normalized.split() if len(w) > 2 and w not in TITLE_STOPWORDS]
+    return {f"t:{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class _Entry:
+    """A record prepared for matching; the title features are only built for
+    records that end up in a candidate pair"""
+
+    __slots__ = ("record", "id", "ref", "title", "organization", "_trigrams", "_part_label")
+
+    def __init__(self, record: Mapping[str, Any]):
+        self.record = record
+        self.id = record.get("id")
+        self.ref = normalize_reference(record.get("reference", ""))
+        self.title = normalize_title(record.get("title", ""))
+        self.organization = record.get("organization", "")
+        self._trigrams = None
+        self._part_label = False
+
+    @property
+    def trigrams(self) -> Set[str]:
+        if self._trigrams is None:
+            self._trigrams = _trigrams(self.title)
+        return self._trigrams
+
+    @property
+    def part_label(self) -> Optional[str]:
+        if self._part_label is False:
+            part = _PART_RE.search(self.record.get("title", "").lower())
+            self._part_label = part.group(1) if part else None
+        return self._part_label
+
+
+def score_pair(a: _Entry, b: _Entry) -> Tuple[float, Optional[str]]:
+    """Score two records, returns (score, relation)"""
+    ref_a, ref_b = a.ref, b.ref
+    # Different parts of the same series are different documents
+    if ref_a["number"] and ref_a["number"] == ref_b["number"] and ref_a["part"] != ref_b["part"]:
+        return 0.0, None
+
+    same_key = ref_a["key"] and ref_a["key"] == ref_b["key"]
+    # Two numbered documents of the same body are distinct unless the numbers agree
+    if ref_a["key"] and ref_b["key"] and not same_key and a.organization == b.organization:
+        return 0.0, None
+    if a.part_label and b.part_label and a.part_label != b.part_label:
+        return 0.0, None
+
+    similarity = title_similarity(a.trigrams, b.trigrams)
+    if same_key:
+        cross = a.organization != b.organization
+        # EN and ISO numbering only coincide for adoptions ('EN ISO ...')
+        adopted = "ISO" in ref_a["bodies"] and "ISO" in ref_b["bodies"]
+        ref_score = 1.0 if not cross or adopted else 0.7
+        if cross:
+            relation = "adoption"
+        elif (ref_a["year"], ref_a["amendments"]) != (ref_b["year"], ref_b["amendments"]):
+            relation = "amendment"
+        else:
+            relation = "duplicate"
+        return 0.5 * ref_score + 0.5 * similarity, relation
+
+    # Title evidence alone has to be near-identical
+    return 0.8 * similarity, "adoption" if a.organization != b.organization else "duplicate"
+
+
+def _edition(entry: _Entry) -> Tuple:
+    """Sort key for the group primary: a base document (or one carrying A/Amd
+    amendments) over a corrigendum-only row, then latest edition, then ISO"""
+    ref = entry.ref
+    amendments = [a for a in ref["amendments"] if not a.startswith("AC:")]
+    corrigendum_only = bool(ref["amendments"]) and not amendments
+    return (not corrigendum_only, ref["year"] or "", len(amendments), entry.organization == "ISO")
+
+
+def find_duplicate_groups(records: Iterable[Mapping[str, Any]], threshold: float = 0.75,
+                          max_block_size: int = 100) -> List[Dict[str, Any]]:
+    """Group records describing the same work item
+
+    Returns one dict per group with the member ids, a 'primary' id (latest
+    edition, ISO preferred, never a corrigendum-only row) and the scored links
+    that formed the group.
+    """
+    # Anything with dict-style get() works, e.g. StandardRecord rows
+    entries = [_Entry(r) for r in records if hasattr(r, "get") and r.get("id")]
+
+    index = BlockingIndex(max_block_size)
+    for pos, entry in enumerate(entries):
+        if entry.ref["number"]:
+            index.add(f"n:{entry.ref['number']}", pos)
+        for key in _title_blocks(entry.title):
+            index.add(key, pos)
+
+    parent = list(range(len(entries)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    links = []
+    for i, j in sorted(index.candidate_pairs()):
+        score, relation = score_pair(entries[i], entries[j])
+        if score >= threshold:
+            links.append((i, j, round(score, 3), relation))
+            parent[find(i)] = find(j)
+
+    members: Dict[int, List[int]] = {}
+    for pos in range(len(entries)):
+        members.setdefault(find(pos), []).append(pos)
+
+    groups = []
+    link_map: Dict[int, List[Dict[str, Any]]] = {}
+    for i, j, score, relation in links:
+        link_map.setdefault(find(i), []).append({
+            "source": entries[i].id,
+            "target": entries[j].id,
+            "relation": relation,
+            "score": score,
+        })
+    for root, positions in members.items():
+        if len(positions) < 2:
+            continue
+        positions.sort(key=lambda p: _edition(entries[p]), reverse=True)
+        primary = entries[positions[0]].id
+        groups.append({
+            "group_id": f"dup_{primary}",
+            "primary": primary,
+            "members": [entries[p].id for p in positions],
+            "organizations": sorted({entries[p].organization for p in positions}),
+            "links": link_map.get(root, []),
+        })
+    groups.sort(key=lambda g: g["group_id"])
+    return groups
@@ -0,0 +1,195 @@
+# WPSG Locking - per-file reader-writer locks and the scan guard
+#
+# eel runs exposed functions concurrently, so a viewer load can overlap an
+# update_last_scan write and two committee edits can interleave their
+# load -> mutate -> save. Each JSON file gets one ReadWriteLock shared by every
+# ConfigManager in the process: any number of readers proceed together, a
+# writer waits for them to finish and blocks new readers until it committed.
+#
+# Other processes (the cron CLI next to the GUI) are kept apart by an OS lock
+# on a '<file>.lock' file around every check-and-replace, and a save only goes
+# through if the file content still hashes to the version it was loaded at.
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class VersionConflictError(Exception):
+    """A file changed between loading it and saving it back"""
+
+
+class ReadWriteLock:
+    """Writer-preferring reader-writer lock
+
+    Re-entrant per thread: a reader may read again, a writer may read or write
+    again. Upgrading a read lock to a write lock is refused, since two threads
+    doing it at once would deadlock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {}
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me or me in self._readers:
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers[me] = 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            depth = self._readers[me] - 1
+            if depth:
+                self._readers[me] = depth
+                return
+            del self._readers[me]
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+_registry: Dict[str, ReadWriteLock] = {}
+_registry_lock = threading.Lock()
+
+
+def lock_for(path: str) -> ReadWriteLock:
+    """The process-wide lock guarding one file"""
+    key = os.path.normcase(os.path.abspath(path))
+    with _registry_lock:
+        lock = _registry.get(key)
+        if lock is None:
+            lock = _registry[key] = ReadWriteLock()
+        return lock
+
+
+def content_version(data: bytes) -> str:
+    """Version of a file's content, compared before a save"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_version(path: str) -> Optional[str]:
+    """content_version of a file on disk, or None if it does not exist"""
+    try:
+        with open(path, 'rb') as f:
+            return content_version(f.read())
+    except FileNotFoundError:
+        return None
+
+
+_held = threading.local()
+
+
+@contextmanager
+def process_lock(path: str):
+    """Exclusive lock on '<path>.lock' shared with other processes
+
+    Re-entrant per thread. Threads of one process must also hold the file's
+    ReadWriteLock for writing, the OS lock only keeps processes apart. The
+    lock file is left in place: removing it would let two processes lock
+    different files with the same name.
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    held = _held.__dict__.setdefault("paths", set())
+    if key in held:
+        yield
+        return
+    with open(f"{path}.lock", 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s
+                    time.sleep(0.1)
+        held.add(key)
+        try:
+            yield
+        finally:
+            held.discard(key)
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def temp_path(path: str) -> str:
+    """Unique temporary file next to 'path' for an atomic os.replace"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class ScanGuard:
+    """Atomic 'one scan at a time' flag"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Claim the scan slot, returns False if a scan is already running"""
+        return self._lock.acquire(blocking=False)
+
+    def release(self):
+        self._lock.release()
+
+    @property
+    def active(self) -> bool:
+        return self._lock.locked()
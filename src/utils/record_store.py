@@ -0,0 +1,268 @@
+# WPSG Record Store - compact in-memory records and the binary snapshot cache
+#
+# Records are kept as tuples with named fields instead of dicts, so the field
+# names are not repeated per record, and the low-cardinality values
+# (organization, committee, category) are interned so every record shares one
+# string object.
+#
+# Next to each JSON database a '.cache' file holds the same normalized rows
+# written with marshal (stdlib, no msgpack dependency). Loading it skips JSON
+# parsing and normalization and only wraps each row; it is rebuilt whenever the
+# JSON file's mtime/size no longer match the signature stored in the cache. The
+# cache also carries the content version of the JSON it was built from, which
+# saves check against (see ConfigManager._write_json).
+import copy
+import gc
+import marshal
+import os
+import sys
+from collections import namedtuple
+from typing import Dict, List, Any, Optional, Tuple
+
+from src.utils.locking import temp_path
+
+
+# Field order matches the order used in the JSON databases
+RECORD_FIELDS = (
+    "id", "reference", "title", "committee", "wi_number", "organization", "category",
+    "publication_date", "deletion_date", "reason", "status", "last_updated",
+)
+INTERNED_FIELDS = ("organization", "committee", "category")
+SECTIONS = ("cen_standards", "iso_standards")
+
+CACHE_MAGIC = b"WPSGREC1"
+CACHE_VERSION = (3,) + tuple(sys.version_info[:2])  # marshal is Python version specific
+
+Signature = Optional[Tuple[int, int]]
+
+
+def file_signature(path: str) -> Signature:
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+_INTERNED_POSITIONS = tuple(RECORD_FIELDS.index(f) for f in INTERNED_FIELDS)
+
+
+class StandardRecord(namedtuple("_StandardRecord", RECORD_FIELDS + ("extra", "nulls"))):
+    """One standard as a tuple
+
+    Absent fields are None; 'nulls' names the known fields that were present
+    with an explicit null, so to_dict() gives back the same keys. Unknown keys
+    are kept in 'extra'.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StandardRecord":
+        values = [data.get(field) for field in RECORD_FIELDS]
+        for pos in _INTERNED_POSITIONS:
+            values[pos] = _intern(values[pos])
+        extra = {k: v for k, v in data.items() if k not in RECORD_FIELDS} or None
+        nulls = tuple(f for f, v in zip(RECORD_FIELDS, values) if v is None and f in data) or None
+        return tuple.__new__(cls, values + [extra, nulls])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get-style read access, so read-only callers can skip to_dict()
+
+        Nested values in 'extra' are shared with the cached table; don't mutate them.
+        """
+        if key not in RECORD_FIELDS:
+            return (self.extra or {}).get(key, default)
+        value = getattr(self, key)
+        if value is None and not (self.nulls and key in self.nulls):
+            return default
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fresh dict in the JSON database shape; nothing in it is shared with the record"""
+        nulls = self.nulls or ()
+        data = {field: value for field, value in zip(RECORD_FIELDS, self)
+                if value is not None or field in nulls}
+        if self.extra:
+            data.update(copy.deepcopy(self.extra))
+        return data
+
+    def __repr__(self):
+        return f"StandardRecord({self.id!r}, {self.reference!r})"
+
+
+class RecordTable:
+    """A normalized database held as StandardRecord lists
+
+    'signature' is the stat signature of the JSON file (cache freshness),
+    'version' its content version (pass to save_database as expected_version).
+    """
+
+    __slots__ = ("signature", "version", "metadata", "sections", "other")
+
+    def __init__(self, metadata: Dict[str, Any], sections: Dict[str, List[StandardRecord]],
+                 other: Dict[str, Any] = None, signature: Signature = None, version: str = None):
+        self.signature = signature
+        self.version = version
+        self.metadata = metadata
+        self.sections = sections
+        self.other = other or {}
+
+    @classmethod
+    def from_database(cls, database: Dict[str, Any], signature: Signature = None,
+                      version: str = None) -> "RecordTable":
+        """Build from a normalized database dict (see ConfigManager._normalize_db_structure)"""
+        sections = {}
+        for section in SECTIONS:
+            sections[section] = [StandardRecord.from_dict(r) for r in database.get(section, [])
+                                 if isinstance(r, dict)]
+        other = {k: v for k, v in database.items() if k != "metadata" and k not in SECTIONS}
+        return cls(dict(database.get("metadata", {})), sections, other, signature, version)
+
+    def records(self, organization: str = None) -> List[StandardRecord]:
+        """All records (optionally of one organization) without converting them to dicts"""
+        records = [r for section in SECTIONS for r in self.sections[section]]
+        if organization:
+            organization = organization.upper()
+            records = [r for r in records if r.organization == organization]
+        return records
+
+    def to_database(self) -> Dict[str, Any]:
+        """Fresh database dict; callers may mutate it freely"""
+        database = {"metadata": dict(self.metadata)}
+        database.update(copy.deepcopy(self.other))
+        for section in SECTIONS:
+            database[section] = [r.to_dict() for r in self.sections[section]]
+        return database
+
+    def __len__(self):
+        return sum(len(records) for records in self.sections.values())
+
+
+def write_snapshot(path: str, table: RecordTable) -> bool:
+    """Write a table to the binary cache file"""
+    payload = (
+        CACHE_VERSION,
+        table.signature,
+        table.version,
+        table.metadata,
+        table.other,
+        {section: [tuple(r) for r in records] for section, records in table.sections.items()},
+    )
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(CACHE_MAGIC)
+            f.write(marshal.dumps(payload))
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, ValueError) as e:
+        print(f"Error writing snapshot cache {path}: {e}")
+        return False
+
+
+def read_snapshot(path: str, signature: Signature) -> Optional[RecordTable]:
+    """Read a table from the binary cache, or None if missing, stale or unreadable"""
+    if signature is None:
+        return None
+    # The rows contain no cycles; the collector would only slow the bulk load down
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    return None
+                cache_version, cached_signature, version, metadata, other, rows = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if cache_version != CACHE_VERSION or tuple(cached_signature or ()) != tuple(signature):
+            return None
+
+        # Interned values were shared objects when dumped, marshal keeps them shared
+        new = tuple.__new__
+        sections = {section: [new(StandardRecord, row) for row in rows.get(section, [])]
+                    for section in SECTIONS}
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return RecordTable(metadata, sections, other, signature, version)
+
+
+# Load time and memory for 100k records: the old JSON path vs the cache, as dicts and as records
+if __name__ == "__main__":
+    import json
+    import tempfile
+    import time
+    import tracemalloc
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    committees = [f"CEN/TC {n}" for n in range(40)] + [f"ISO/TC {n}" for n in range(40)]
+    categories = ["packaging", "plastics", "paper_machinery", "food_contact", "medical_devices"]
+    records = []
+    for i in range(count):
+        org = "CEN" if i % 2 else "ISO"
+        records.append({
+            "id": f"{org.lower()}_en_{i}_2024",
+            "reference": f"{'EN' if org == 'CEN' else 'ISO'} {i}:2024",
+            "title": f"Packaging - Test method {i} - Part {i % 7}: Requirements for recyclability",
+            "committee": committees[i % len(committees)],
+            "wi_number": f"WI=00{i:06d}",
+            "organization": org,
+            "category": categories[i % len(categories)],
+            "last_updated": "2025-09-07T14:27:03.273054",
+        })
+    database = {
+        "metadata": {"version": "1.0", "total_records": count},
+        "cen_standards": [r for r in records if r["organization"] == "CEN"],
+        "iso_standards": [r for r in records if r["organization"] == "ISO"],
+    }
+
+    from config_manager import ConfigManager
+
+    tmp_dir = tempfile.mkdtemp()
+    manager = ConfigManager(tmp_dir)
+    json_path = manager.standards_db_file
+    cache_path = os.path.splitext(json_path)[0] + ".cache"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(database, f, indent=2, ensure_ascii=False)
+    signature = file_signature(json_path)
+    write_snapshot(cache_path, RecordTable.from_database(database, signature))
+    del records, database
+
+    def measure(load):
+        tracemalloc.start()
+        result = load()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del result
+        # Timing again without tracemalloc overhead
+        started = time.perf_counter()
+        load()
+        return time.perf_counter() - started, size
+
+    def baseline():
+        # What get_standards_data did before the record table existed
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return manager._normalize_db_structure(json.load(f), "under_development")
+
+    warm = ConfigManager(tmp_dir)
+    warm.get_record_table()
+    rows = [
+        ("json.load + normalize (old get_standards_data)", baseline),
+        ("read_snapshot", lambda: read_snapshot(cache_path, signature)),
+        ("get_standards_data, cold from cache", lambda: ConfigManager(tmp_dir).get_standards_data(with_duplicates=False)),
+        ("get_standards_data, warm", lambda: warm.get_standards_data(with_duplicates=False)),
+        ("get_records, cold from cache", lambda: ConfigManager(tmp_dir).get_records()),
+        ("get_records, warm", lambda: warm.get_records()),
+    ]
+    print(f"{count} records")
+    print(f"  JSON file {os.path.getsize(json_path) / 1e6:.1f} MB, cache file {os.path.getsize(cache_path) / 1e6:.1f} MB")
+    for label, load in rows:
+        elapsed, size = measure(load)
+        print(f"  {label:<48} {elapsed * 1000:6.0f} ms  {size / 1e6:6.1f} MB allocated")
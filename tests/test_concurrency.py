@@ -0,0 +1,187 @@
+# Stress tests for the ConfigManager locking layer and the scan guard
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from config_manager import ConfigManager
+from src.scan_pipeline import DatabaseWriter
+from src.utils.locking import ReadWriteLock
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ConfigManager(str(tmp_path))
+
+
+def run_parallel(calls, workers=16):
+    """Run (function, args) pairs on a thread pool, re-raising any error"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, *args) for fn, args in calls]
+        return [f.result() for f in futures]
+
+
+def test_parallel_committee_edits_lose_no_updates(manager):
+    names = [f"CEN/TC {900 + i}" for i in range(64)]
+    results = run_parallel([(manager.add_committee, ("CEN", name)) for name in names])
+
+    assert all(results)
+    committees = manager.get_committees("CEN")
+    assert all(name in committees for name in names)
+
+
+def test_readers_never_see_partial_writes(manager):
+    manager.add_committee("ISO", "ISO/TC marker")
+    errors = []
+
+    def read():
+        for _ in range(50):
+            config = manager.load_config()
+            if "ISO/TC marker" not in config["committees"]["ISO"]:
+                errors.append("config was reset")
+            data = manager.get_standards_data()
+            if data["metadata"]["total_records"] != 3:
+                errors.append("database incomplete")
+
+    def write(i):
+        for _ in range(20):
+            manager.update_last_scan()
+            manager.set_language("nl" if i % 2 else "en")
+
+    calls = [(read, ())] * 8 + [(write, (i,)) for i in range(4)]
+    run_parallel(calls)
+
+    assert errors == []
+    assert "ISO/TC marker" in manager.get_committees("ISO")
+
+
+def test_many_readers_hold_the_lock_together():
+    lock = ReadWriteLock()
+    barrier = threading.Barrier(6, timeout=5)
+
+    def read():
+        with lock.read():
+            barrier.wait()  # only passes if all six readers are inside at once
+        return True
+
+    assert all(run_parallel([(read, ())] * 6, workers=6))
+
+
+def test_writer_excludes_readers():
+    lock = ReadWriteLock()
+    state = {"writing": False, "overlaps": 0}
+
+    def write():
+        for _ in range(200):
+            with lock.write():
+                state["writing"] = True
+                state["writing"] = False
+
+    def read():
+        for _ in range(200):
+            with lock.read():
+                if state["writing"]:
+                    state["overlaps"] += 1
+
+    run_parallel([(write, ())] * 2 + [(read, ())] * 6)
+    assert state["overlaps"] == 0
+
+
+def test_stale_save_is_refused(manager):
+    config, version = manager.load_config_versioned()
+
+    # Another process edits the file in between
+    with open(manager.config_file, 'r', encoding='utf-8') as f:
+        external = json.load(f)
+    external["settings"]["language"] = "nl-external"
+    with open(manager.config_file, 'w', encoding='utf-8') as f:
+        json.dump(external, f)
+
+    config["settings"]["language"] = "en"
+    assert manager.save_config(config, expected_version=version) is False
+    assert manager.get_language() == "nl-external"
+
+
+def test_same_size_edit_within_mtime_granularity_is_refused(manager):
+    manager.set_language("en")
+    config, version = manager.load_config_versioned()
+    stat = os.stat(manager.config_file)
+
+    # Same length, same mtime: only the content tells the versions apart
+    with open(manager.config_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+    with open(manager.config_file, 'w', encoding='utf-8') as f:
+        f.write(text.replace('"language": "en"', '"language": "nl"'))
+    os.utime(manager.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(manager.config_file).st_size == stat.st_size
+
+    config["settings"]["scan_interval"] = 7
+    assert manager.save_config(config, expected_version=version) is False
+    assert manager.get_language() == "nl"
+
+
+def add_committees_in_process(config_dir, names):
+    manager = ConfigManager(config_dir)
+    return all(manager.add_committee("CEN", name) for name in names)
+
+
+def test_edits_from_other_processes_lose_no_updates(manager):
+    batches = [[f"CEN/TC {700 + 10 * p + i}" for i in range(10)] for p in range(4)]
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(add_committees_in_process, [manager.config_dir] * 4, batches))
+
+    assert all(results)
+    committees = manager.get_committees("CEN")
+    assert all(name in committees for batch in batches for name in batch)
+
+
+def test_scan_commit_merges_with_concurrent_save(manager):
+    writer = DatabaseWriter(manager)
+    writer.add({"id": "cen_en_99999", "reference": "EN 99999", "title": "Scanned",
+                "committee": "CEN/TC 261", "wi_number": "", "organization": "CEN",
+                "category": "packaging", "last_updated": "2025-10-01T00:00:00"})
+
+    # An edit lands while the scan is still running
+    database = manager.get_standards_data(with_duplicates=False)
+    database["iso_standards"][0]["title"] = "Edited meanwhile"
+    assert manager.save_database(database)
+
+    assert writer.commit()
+    saved = manager.get_standards_data(with_duplicates=False)
+    ids = {r["id"] for r in saved["cen_standards"]}
+    assert "cen_en_99999" in ids
+    assert saved["iso_standards"][0]["title"] == "Edited meanwhile"
+
+
+def test_scan_guard_admits_one_scan(manager):
+    barrier = threading.Barrier(8, timeout=5)
+
+    def claim():
+        barrier.wait()
+        return manager.scan_guard.try_acquire()
+
+    assert sum(run_parallel([(claim, ())] * 8, workers=8)) == 1
+    assert manager.scan_guard.active
+    manager.scan_guard.release()
+    assert not manager.scan_guard.active
+
+
+def test_parallel_endpoint_calls(manager, monkeypatch):
+    pytest.importorskip("eel")
+    import wpsg_app
+
+    monkeypatch.setattr(wpsg_app, "config_manager", manager)
+    names = [f"ISO/TC {800 + i}" for i in range(16)]
+    calls = ([(wpsg_app.perform_scan, ())] * 4
+             + [(wpsg_app.add_committee, ("ISO", name)) for name in names]
+             + [(wpsg_app.get_standards_data, (None, "under_development"))] * 8)
+    results = run_parallel(calls, workers=len(calls))
+
+    scans = results[:4]
+    assert sum(1 for r in scans if r["success"]) == 1
+    assert all(results[4:4 + len(names)])
+    assert all(r["metadata"]["total_records"] == 3 for r in results[4 + len(names):])
+    assert all(name in manager.get_committees("ISO") for name in names)
+    assert not any(f.endswith(".tmp") for f in os.listdir(manager.config_dir))
@@ -0,0 +1,154 @@
+# Tests for reference normalization and duplicate/adoption grouping
+import json
+
+import pytest
+
+import config_manager
+from config_manager import ConfigManager
+from src.utils.duplicate_matcher import find_duplicate_groups, normalize_reference
+
+
+def record(id, reference, title, organization):
+    return {"id": id, "reference": reference, "title": title, "organization": organization}
+
+
+def test_normalize_reference_prefixes_and_amendments():
+    ref = normalize_reference("EN ISO 1034-6:2005+A1:2009")
+    assert ref["bodies"] == ["EN", "ISO"]
+    assert (ref["number"], ref["part"], ref["year"], ref["key"]) == ("1034", "6", "2005", "1034-6")
+    assert ref["amendments"] == ["A1:2009"]
+
+    assert normalize_reference("prEN 13432:2000/AC:2005")["amendments"] == ["AC:2005"]
+    assert normalize_reference("ISO 11136:2014/Amd 1:2020")["amendments"] == ["AMD1:2020"]
+    assert normalize_reference("FprEN ISO 11607-1")["bodies"] == ["EN", "ISO"]
+
+
+def test_normalize_reference_keeps_every_part_level():
+    ref = normalize_reference("EN IEC 60335-2-15:2024")
+    assert (ref["number"], ref["part"], ref["year"], ref["key"]) == ("60335", "2-15", "2024", "60335-2-15")
+    assert normalize_reference("EN IEC 60335-2-64:2024")["key"] == "60335-2-64"
+
+
+def test_reference_without_number_has_no_key():
+    assert normalize_reference("EN WI=00172215")["key"] is None
+
+
+def test_multi_level_parts_are_different_documents():
+    records = [
+        record("cen_a", "EN IEC 60335-2-15:2024",
+               "Household and similar electrical appliances - Safety - Part 2-15: "
+               "Particular requirements for appliances for heating liquids", "CEN"),
+        record("cen_b", "EN IEC 60335-2-64:2024",
+               "Household and similar electrical appliances - Safety - Part 2-64: "
+               "Particular requirements for commercial electric kitchen machines", "CEN"),
+    ]
+    assert find_duplicate_groups(records) == []
+
+
+def test_neighbouring_numbers_of_one_body_stay_apart():
+    records = [
+        record("cen_en_645_1993", "EN 645:1993",
+               "Paper and board intended to come into contact with foodstuffs - "
+               "Preparation of a cold water extract", "CEN"),
+        record("cen_en_647_1993", "EN 647:1993",
+               "Paper and board intended to come into contact with foodstuffs - "
+               "Preparation of a hot water extract", "CEN"),
+        record("iso_iso_14024_2018", "ISO 14024:2018",
+               "Environmental labels and declarations - Type I environmental labelling - "
+               "Principles and procedures", "ISO"),
+        record("iso_iso_14025_2006", "ISO 14025:2006",
+               "Environmental labels and declarations - Type III environmental declarations - "
+               "Principles and procedures", "ISO"),
+    ]
+    assert find_duplicate_groups(records) == []
+
+
+def test_amendment_and_adoption_are_grouped():
+    title = "Packaging for terminally sterilized medical devices - Part 1: Requirements for materials"
+    records = [
+        record("iso_iso_11607_1_2019", "ISO 11607-1:2019", title, "ISO"),
+        record("iso_iso_11607_1_2019_amd_1_2023", "ISO 11607-1:2019/Amd 1:2023", title, "ISO"),
+        record("cen_en_iso_11607_1_2020", "EN ISO 11607-1:2020", title, "CEN"),
+        record("iso_iso_11607_2_2019", "ISO 11607-2:2019",
+               "Packaging for terminally sterilized medical devices - Part 2: Validation requirements", "ISO"),
+    ]
+    groups = find_duplicate_groups(records)
+
+    assert len(groups) == 1
+    assert sorted(groups[0]["members"]) == [
+        "cen_en_iso_11607_1_2020", "iso_iso_11607_1_2019", "iso_iso_11607_1_2019_amd_1_2023",
+    ]
+    relations = {link["relation"] for link in groups[0]["links"]}
+    assert {"adoption", "amendment"} <= relations
+
+
+def test_primary_is_never_a_corrigendum():
+    title = "Requirements for packaging recoverable through composting and biodegradation"
+    records = [
+        record("cen_en_13432_2000_ac_2005", "EN 13432:2000/AC:2005", title, "CEN"),
+        record("cen_en_13432_2000", "EN 13432:2000", title, "CEN"),
+    ]
+    assert find_duplicate_groups(records)[0]["primary"] == "cen_en_13432_2000"
+
+    records.append(record("cen_en_13432_2000_a1_2006", "EN 13432:2000+A1:2006", title, "CEN"))
+    assert find_duplicate_groups(records)[0]["primary"] == "cen_en_13432_2000_a1_2006"
+
+
+TITLE = "Packaging for terminally sterilized medical devices - Part 1: Requirements for materials"
+ADOPTION = [
+    record("iso_iso_11607_1_2019", "ISO 11607-1:2019", TITLE, "ISO"),
+    record("cen_en_iso_11607_1_2020", "EN ISO 11607-1:2020", TITLE, "CEN"),
+]
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = ConfigManager(str(tmp_path))
+    manager.save_database({"metadata": {}, "cen_standards": ADOPTION[1:], "iso_standards": ADOPTION[:1]})
+    calls = []
+
+    def counting(records):
+        calls.append(len(records))
+        return find_duplicate_groups(records)
+
+    monkeypatch.setattr(config_manager, "find_duplicate_groups", counting)
+    manager.calls = calls
+    return manager
+
+
+def test_duplicate_groups_are_cached_per_file(manager):
+    groups = manager.get_duplicate_groups()
+    assert len(groups) == 1 and manager.calls == [2]
+
+    groups[0]["members"].clear()  # callers get copies
+    assert len(manager.get_duplicate_groups()[0]["members"]) == 2
+    assert manager.calls == [2]
+
+
+def test_saving_invalidates_the_duplicate_groups(manager):
+    manager.get_duplicate_groups()
+    data = manager.get_standards_data()
+    data["iso_standards"] = []
+    assert manager.save_database(data)
+
+    assert manager.get_duplicate_groups() == []
+    assert manager.calls == [2, 1]
+
+
+def test_duplicate_groups_are_never_saved(manager):
+    data = manager.get_standards_data()
+    assert data["duplicate_groups"] and data["metadata"]["duplicate_groups"] == 1
+    assert manager.save_database(data)
+
+    with open(manager.standards_db_file, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert "duplicate_groups" not in saved and "duplicate_groups" not in saved["metadata"]
+    assert len(saved["cen_standards"]) + len(saved["iso_standards"]) == 2
+
+
+def test_stale_groups_in_old_files_are_dropped(manager):
+    with open(manager.standards_db_file, "w", encoding="utf-8") as f:
+        json.dump({"metadata": {"duplicate_groups": 7}, "duplicate_groups": [{"members": ["x"]}],
+                   "cen_standards": ADOPTION[1:], "iso_standards": []}, f)
+    data = manager.get_standards_data(with_duplicates=False)
+    assert "duplicate_groups" not in data and "duplicate_groups" not in data["metadata"]
@@ -0,0 +1,195 @@
+# Tests for the scan history: deltas, snapshots, as-of rebuilds, timelines and compaction
+import json
+import os
+
+import pytest
+
+from src.history_store import HistoryStore, apply_delta, diff_records
+
+
+def rec(id, title, **fields):
+    organization = "CEN" if id.startswith("cen") else "ISO"
+    return dict({"id": id, "reference": id.upper(), "title": title, "organization": organization}, **fields)
+
+
+def database(*records):
+    return {
+        "metadata": {"total_records": len(records)},
+        "cen_standards": [r for r in records if r["organization"] == "CEN"],
+        "iso_standards": [r for r in records if r["organization"] != "CEN"],
+    }
+
+
+def state_of(db):
+    return {r["id"]: r for r in db["cen_standards"] + db["iso_standards"]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history"), snapshot_interval=3)
+
+
+# Five scans: add, change, add + delete, unset a field, change again
+STATES = [
+    (rec("cen_a", "A"), rec("iso_b", "B", wi_number="WI=1")),
+    (rec("cen_a", "A v2"), rec("iso_b", "B", wi_number="WI=1")),
+    (rec("cen_a", "A v2"), rec("iso_c", "C")),
+    (rec("cen_a", "A v2"), rec("iso_c", "C", status="draft")),
+    (rec("cen_a", "A v3"), rec("iso_c", "C", status="draft")),
+]
+TIMES = [f"2025-0{month}-01T12:00:00" for month in range(1, 6)]
+
+
+@pytest.fixture
+def recorded(store):
+    ids = [store.record_scan(database(*state), scanned_at=when) for state, when in zip(STATES, TIMES)]
+    assert all(ids)
+    return ids
+
+
+def test_diff_and_apply_round_trip():
+    previous = state_of(database(rec("cen_a", "A", wi_number="WI=1"), rec("iso_b", "B")))
+    current = state_of(database(rec("cen_a", "A2"), rec("iso_c", "C")))
+    delta = diff_records(previous, current)
+
+    assert list(delta["added"]) == ["iso_c"]
+    assert delta["deleted"] == ["iso_b"]
+    assert delta["changed"]["cen_a"] == {"set": {"title": "A2"}, "unset": ["wi_number"]}
+    assert apply_delta(json.loads(json.dumps(previous)), delta) == current
+
+
+def test_first_scan_is_a_base_without_a_full_delta(store, recorded):
+    first = store.scans()[0]
+    assert first["delta"] is False and first["snapshot"] is True
+    deltas = os.listdir(os.path.join(store.history_dir, "under_development", "deltas"))
+    assert f"{recorded[0]}.json" not in deltas
+
+
+def test_baseline_keeps_the_state_before_the_first_scan(store):
+    before = database(rec("cen_a", "A old"), rec("iso_b", "B", wi_number="WI=1"))
+    before["metadata"]["last_updated"] = "2024-12-01T09:00:00"
+    baseline = store.record_baseline(before)
+    assert store.record_baseline(before) is None  # only once
+
+    scan_id = store.record_scan(database(*STATES[0]), scanned_at=TIMES[0])
+    with open(os.path.join(store.history_dir, "under_development", "deltas", f"{scan_id}.json"),
+              encoding="utf-8") as f:
+        delta = json.load(f)
+    assert delta["added"] == {}
+    assert delta["changed"] == {"cen_a": {"set": {"title": "A"}, "unset": []}}
+
+    assert state_of(store.database_as_of("2024-12-15")) == state_of(before)
+    assert store.database_as_of("2024-11-30") is None
+    events = store.timeline("cen_a")
+    assert [(e["scan_id"], e["change"]) for e in events] == [(baseline, "snapshot"), (scan_id, "changed")]
+    assert events[0]["record"]["title"] == "A old"
+
+
+def test_unchanged_database_records_nothing(store):
+    db = database(*STATES[0])
+    assert store.record_scan(db, scanned_at=TIMES[0])
+    assert store.record_scan(db, scanned_at=TIMES[1]) is None
+    assert len(store.scans()) == 1
+
+
+def test_snapshots_every_interval(store, recorded):
+    assert [s["snapshot"] for s in store.scans()] == [True, False, False, True, False]
+    snapshots = os.listdir(os.path.join(store.history_dir, "under_development", "snapshots"))
+    assert sorted(snapshots) == sorted(f"{recorded[i]}.json.gz" for i in (0, 3))
+
+
+def test_database_as_of_scan_boundaries(store, recorded):
+    assert store.database_as_of("2024-12-31") is None
+    for position, when in enumerate(TIMES):
+        rebuilt = store.database_as_of(when)
+        assert rebuilt["metadata"]["scan_id"] == recorded[position]
+        assert state_of(rebuilt) == state_of(database(*STATES[position]))
+
+    # Just before a scan still shows the previous one; a bare date covers the whole day
+    assert store.database_as_of("2025-03-01T11:59:59")["metadata"]["scan_id"] == recorded[1]
+    assert store.database_as_of("2025-03-01")["metadata"]["scan_id"] == recorded[2]
+    assert store.database_as_of("2030-01-01")["metadata"]["scan_id"] == recorded[4]
+
+
+def test_timeline_of_one_record(store, recorded):
+    events = store.timeline("iso_b")
+    assert [e["change"] for e in events] == ["snapshot", "deleted"]
+    assert [e["scan_id"] for e in events] == [recorded[0], recorded[2]]
+
+    events = store.timeline("iso_c")
+    assert [e["change"] for e in events] == ["added", "changed"]
+    assert events[-1]["fields"] == {"status": "draft"}
+    assert events[-1]["record"]["status"] == "draft"
+
+
+def test_timeline_follows_a_record_across_databases(store):
+    draft, published = rec("cen_a", "A draft"), rec("cen_a", "A")
+    store.record_scan(database(draft, rec("cen_b", "B")), scanned_at=TIMES[0])
+    store.record_scan(database(rec("cen_b", "B")), scanned_at=TIMES[2])
+    store.record_scan(database(published), "recently_published", scanned_at=TIMES[1])
+
+    assert store.db_types() == ["recently_published", "under_development"]
+    events = store.timeline("cen_a")
+    assert [(e["db_type"], e["change"]) for e in events] == [
+        ("under_development", "snapshot"), ("recently_published", "snapshot"),
+        ("under_development", "deleted")]
+    assert [e["change"] for e in store.timeline("cen_a", "recently_published")] == ["snapshot"]
+
+
+def test_compact_folds_old_scans_and_rewrites_index(store, recorded):
+    assert store.compact("2025-04-01") == 2
+
+    scans = store.scans()
+    assert [s["scan_id"] for s in scans] == recorded[2:]
+    assert scans[0]["delta"] is False and scans[0]["snapshot"] is True
+
+    index_path = os.path.join(store.history_dir, "under_development", "index.json")
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    # Deleted before the base: gone; alive at the base: starts at the base scan
+    assert "iso_b" not in index["records"]
+    assert index["records"]["cen_a"] == [recorded[2], recorded[4]]
+    assert index["records"]["iso_c"] == [recorded[2], recorded[3]]
+
+    history_dir = os.path.join(store.history_dir, "under_development")
+    assert sorted(os.listdir(os.path.join(history_dir, "deltas"))) == sorted(f"{s}.json" for s in recorded[3:])
+    assert sorted(os.listdir(os.path.join(history_dir, "snapshots"))) == sorted(
+        f"{recorded[i]}.json.gz" for i in (2, 3))
+
+    # Older dates now resolve to nothing, later ones are unchanged
+    assert store.database_as_of(TIMES[1]) is None
+    for position in range(2, 5):
+        assert state_of(store.database_as_of(TIMES[position])) == state_of(database(*STATES[position]))
+
+
+def test_timeline_across_compaction(store, recorded):
+    store.compact("2025-04-01")
+    events = store.timeline("cen_a")
+
+    assert [e["change"] for e in events] == ["snapshot", "changed"]
+    assert events[0]["record"]["title"] == "A v2"
+    assert events[1]["record"]["title"] == "A v3"
+
+
+def test_scans_after_compaction_keep_building_on_the_base(store, recorded):
+    store.compact("2025-04-01")
+    later = (rec("cen_a", "A v3"), rec("iso_c", "C", status="published"))
+    scan_id = store.record_scan(database(*later), scanned_at="2025-06-01T12:00:00")
+
+    assert state_of(store.database_as_of("2025-06-01")) == state_of(database(*later))
+    assert store.timeline("iso_c")[-1]["scan_id"] == scan_id
+
+
+@pytest.mark.parametrize("when", ["2025/02/01", "last week", "", "2025-13-01"])
+def test_bad_dates_are_rejected_before_anything_is_folded(store, recorded, when):
+    with pytest.raises(ValueError):
+        store.compact(when)
+    with pytest.raises(ValueError):
+        store.database_as_of(when)
+    assert [s["scan_id"] for s in store.scans()] == recorded
+
+
+def test_dates_compare_as_dates_not_strings(store, recorded):
+    # As strings ' ' sorts before 'T', so these would miss the scan at that instant
+    assert store.database_as_of("2025-03-01 12:00")["metadata"]["scan_id"] == recorded[2]
+    assert store.compact("2025-02-01 12:00:01") == 1
@@ -0,0 +1,146 @@
+# Tests for the headless CLI: JSON-lines output, exit codes and the commands
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from config_manager import ConfigManager
+from src.main import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures", "scans")
+
+
+def test_importing_the_cli_creates_no_config(tmp_path):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    subprocess.run([sys.executable, "-c", "import config_manager, src.main"],
+                   cwd=str(tmp_path), env=env, check=True)
+    assert os.listdir(str(tmp_path)) == []
+
+
+@pytest.fixture
+def cli(tmp_path, capsys):
+    """Run the CLI on a config dir under tmp_path, returns (exit code, stdout events, stderr)"""
+    def run(*argv):
+        code = main(["--config-dir", str(tmp_path / "config"), *argv])
+        out, err = capsys.readouterr()
+        # One JSON object per stdout line, nothing else
+        events = [json.loads(line) for line in out.splitlines()]
+        assert all(isinstance(e, dict) and "event" in e and "time" in e for e in events)
+        return code, events, err
+    return run
+
+
+def write_database(tmp_path, database, db_type="under_development"):
+    path = tmp_path / "config" / f"{db_type}_database.json"
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(json.dumps(database), encoding="utf-8")
+    return path
+
+
+LEGACY = {
+    "metadata": {"version": "1.0"},
+    "cen_standards": {"records": [{"id": "cen_en_1_2000", "reference": "EN 1:2000", "organization": "CEN",
+                                   "winumber": "WI=1"}]},
+    "iso_standards": [],
+}
+
+
+def test_status(cli):
+    code, events, _ = cli("status")
+    assert code == 0
+    [status] = events
+    assert status["event"] == "status"
+    assert set(status["databases"]) == {"under_development", "recently_published", "iso_deleted"}
+
+
+def test_scan_without_source_fails(cli):
+    code, events, _ = cli("scan")
+    assert code == 1
+    assert [e["event"] for e in events] == ["error"]
+
+
+def test_scan_from_recorded_payloads(cli):
+    code, events, _ = cli("scan", "--source", FIXTURES, "--parse-workers", "1")
+    assert code == 0
+    assert events[0]["event"] == "scan_started" and events[-1]["event"] == "scan_finished"
+    assert events[-1]["success"] and events[-1]["added"] > 0
+
+
+@pytest.mark.parametrize("argv", [("history", "timeline"), ("history", "as-of", "last week"),
+                                  ("history", "compact", "2025/01/01")])
+def test_history_usage_errors(cli, argv):
+    code, events, _ = cli(*argv)
+    assert code == 2
+    assert [e["event"] for e in events] == ["error"]
+
+
+def test_migrate_dry_run_writes_nothing(cli, tmp_path):
+    path = write_database(tmp_path, LEGACY)
+    before = path.read_bytes()
+
+    code, events, _ = cli("migrate", "--db-type", "under_development", "--dry-run")
+    assert code == 0
+    assert events[0]["changed"] and not events[0]["saved"]
+    assert path.read_bytes() == before
+
+    code, events, _ = cli("migrate", "--db-type", "under_development")
+    assert code == 0 and events[0]["saved"]
+    assert json.loads(path.read_text(encoding="utf-8"))["cen_standards"][0]["wi_number"] == "WI=1"
+
+
+def test_migrate_refuses_to_overwrite_a_newer_file(cli, tmp_path, monkeypatch):
+    path = write_database(tmp_path, LEGACY)
+    get_record_table = ConfigManager.get_record_table
+
+    def load_then_scan(manager, db_type="under_development"):
+        table = get_record_table(manager, db_type)
+        # A scan commits between loading and saving
+        write_database(tmp_path, dict(LEGACY, iso_standards=[{"id": "iso_iso_2", "reference": "ISO 2"}]))
+        return table
+
+    monkeypatch.setattr(ConfigManager, "get_record_table", load_then_scan)
+    code, events, err = cli("migrate", "--db-type", "under_development")
+
+    assert code == 3
+    assert events[0]["changed"] and not events[0]["saved"]
+    assert "Not saving database" in err  # diagnostics go to stderr
+    assert json.loads(path.read_text(encoding="utf-8"))["iso_standards"][0]["id"] == "iso_iso_2"
+
+
+def test_export_collapse_duplicates(cli, tmp_path):
+    title = "Packaging for terminally sterilized medical devices - Part 1: Requirements for materials"
+    write_database(tmp_path, {
+        "metadata": {},
+        "cen_standards": [{"id": "cen_en_iso_11607_1_2020", "reference": "EN ISO 11607-1:2020",
+                           "title": title, "organization": "CEN"}],
+        "iso_standards": [{"id": "iso_iso_11607_1_2019", "reference": "ISO 11607-1:2019",
+                           "title": title, "organization": "ISO"},
+                          {"id": "iso_iso_10399_2017", "reference": "ISO 10399:2017",
+                           "title": "Paper and board - Determination of 2,6-di-tert-butyl-4-methylphenol",
+                           "organization": "ISO"}],
+    })
+    output = str(tmp_path / "export.json")
+
+    code, events, _ = cli("export", "--format", "json", "--output", output)
+    assert code == 0 and events[-1]["records"] == 3
+
+    code, events, _ = cli("export", "--format", "json", "--output", output, "--collapse-duplicates")
+    assert code == 0 and events[-1]["records"] == 2
+    with open(output, encoding="utf-8") as f:
+        ids = {r["id"] for r in json.load(f)}
+    assert "iso_iso_10399_2017" in ids
+    assert len(ids & {"cen_en_iso_11607_1_2020", "iso_iso_11607_1_2019"}) == 1
+
+
+def test_history_timeline_spans_all_databases(cli):
+    cli("scan", "--source", FIXTURES, "--parse-workers", "1")
+    code, events, _ = cli("history", "timeline", "iso_iso_10399_2017")
+    assert code == 0
+    assert events and all(e["event"] == "record_change" and e["db_type"] == "under_development"
+                          for e in events)
+
+    code, events, _ = cli("history", "timeline", "iso_iso_10399_2017", "--db-type", "iso_deleted")
+    assert code == 1 and [e["event"] for e in events] == ["error"]
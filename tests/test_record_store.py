@@ -0,0 +1,173 @@
+# Tests for the compact record representation and the binary snapshot cache
+import json
+import os
+
+import pytest
+
+from config_manager import ConfigManager
+from src.utils.record_store import (CACHE_MAGIC, RecordTable, StandardRecord, file_signature,
+                                    read_snapshot, write_snapshot)
+
+
+RECORD = {
+    "id": "cen_en_13432_2000",
+    "reference": "EN 13432:2000",
+    "title": "Packaging - Requirements for packaging recoverable through composting",
+    "committee": "CEN/TC 261",
+    "wi_number": "",
+    "organization": "CEN",
+    "category": "packaging",
+    "last_updated": "2025-09-07T14:27:03",
+    "source_url": "https://example.org/13432",
+    "notes": {"checked": True},
+}
+
+
+def test_record_round_trip_keeps_extra_keys():
+    record = StandardRecord.from_dict(RECORD)
+
+    assert record.to_dict() == RECORD
+    assert record.extra == {"source_url": "https://example.org/13432", "notes": {"checked": True}}
+    assert record.get("reference") == "EN 13432:2000"
+    assert record.get("source_url") == "https://example.org/13432"
+    assert record.get("publication_date", "n/a") == "n/a"
+    assert "publication_date" not in record.to_dict()
+
+
+def test_explicit_nulls_survive_the_round_trip(tmp_path):
+    data = dict(RECORD, publication_date=None, notes=None)
+    record = StandardRecord.from_dict(data)
+
+    assert record.to_dict() == data
+    assert record.get("publication_date", "n/a") is None
+    assert record.get("deletion_date", "n/a") == "n/a"
+
+    # ...and through the cache file
+    table = RecordTable.from_database({"metadata": {}, "cen_standards": [data]}, (1, 1))
+    cache_path = str(tmp_path / "db.cache")
+    write_snapshot(cache_path, table)
+    assert read_snapshot(cache_path, (1, 1)).to_database()["cen_standards"] == [data]
+
+
+def test_dicts_share_nothing_with_the_cached_table(tmp_path):
+    manager = ConfigManager(str(tmp_path))
+    write_database(manager, [RECORD])
+
+    first = manager.get_standards_data(with_duplicates=False)
+    first["cen_standards"][0]["notes"]["checked"] = False
+    first["cen_standards"][0]["title"] = "changed"
+
+    again = manager.get_standards_data(with_duplicates=False)["cen_standards"][0]
+    assert again["notes"] == {"checked": True}
+    assert again["title"] == RECORD["title"]
+
+
+def test_low_cardinality_fields_are_interned():
+    a = StandardRecord.from_dict(json.loads(json.dumps(RECORD)))
+    b = StandardRecord.from_dict(json.loads(json.dumps(RECORD)))
+    for field in ("organization", "committee", "category"):
+        assert getattr(a, field) is getattr(b, field)
+    assert a.title == b.title
+
+
+def test_table_round_trip_and_filtering():
+    database = {
+        "metadata": {"version": "1.0", "total_records": 2},
+        "cen_standards": [RECORD],
+        "iso_standards": [{"id": "iso_iso_1", "reference": "ISO 1", "organization": "ISO"}, "junk"],
+        "comment": ["kept"],
+    }
+    table = RecordTable.from_database(database)
+
+    assert len(table) == 2
+    assert [r.id for r in table.records("iso")] == ["iso_iso_1"]
+    rebuilt = table.to_database()
+    assert rebuilt["cen_standards"] == [RECORD]
+    assert rebuilt["comment"] == ["kept"]
+
+    rebuilt["cen_standards"][0]["title"] = "changed"
+    rebuilt["comment"].append("changed")
+    assert table.to_database()["cen_standards"][0]["title"] == RECORD["title"]
+    assert table.to_database()["comment"] == ["kept"]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    json_path = tmp_path / "db.json"
+    json_path.write_text(json.dumps({"cen_standards": [RECORD]}), encoding="utf-8")
+    signature = file_signature(str(json_path))
+    table = RecordTable.from_database({"metadata": {}, "cen_standards": [RECORD]}, signature, "v1")
+    cache_path = str(tmp_path / "db.cache")
+    assert write_snapshot(cache_path, table)
+    return cache_path, signature
+
+
+def test_snapshot_round_trip(snapshot):
+    cache_path, signature = snapshot
+    table = read_snapshot(cache_path, signature)
+
+    assert table.version == "v1"
+    assert table.signature == signature
+    assert table.to_database()["cen_standards"] == [RECORD]
+    assert isinstance(table.sections["cen_standards"][0], StandardRecord)
+
+
+def test_stale_snapshot_is_ignored(snapshot):
+    cache_path, (mtime_ns, size) = snapshot
+    assert read_snapshot(cache_path, (mtime_ns + 1, size)) is None
+    assert read_snapshot(cache_path, (mtime_ns, size + 1)) is None
+    assert read_snapshot(cache_path, None) is None
+
+
+@pytest.mark.parametrize("content", [b"", b"not a cache", CACHE_MAGIC, CACHE_MAGIC + b"\x00garbage"])
+def test_corrupt_snapshot_is_ignored(snapshot, content):
+    cache_path, signature = snapshot
+    with open(cache_path, "wb") as f:
+        f.write(content)
+    assert read_snapshot(cache_path, signature) is None
+
+
+def test_missing_snapshot_is_ignored(tmp_path):
+    assert read_snapshot(str(tmp_path / "missing.cache"), (1, 1)) is None
+
+
+def write_database(manager, records):
+    with open(manager.standards_db_file, "w", encoding="utf-8") as f:
+        json.dump({"metadata": {}, "cen_standards": records, "iso_standards": []}, f)
+
+
+def test_manager_rebuilds_cache_when_json_changes(tmp_path):
+    manager = ConfigManager(str(tmp_path))
+    cache_file = os.path.splitext(manager.standards_db_file)[0] + ".cache"
+    write_database(manager, [RECORD])
+    assert [r.id for r in manager.get_records()] == [RECORD["id"]]
+    assert os.path.exists(cache_file)
+
+    # A fresh manager is served from the cache file
+    assert [r.id for r in ConfigManager(str(tmp_path)).get_records()] == [RECORD["id"]]
+
+    # A different size invalidates both the in-memory table and the cache file
+    write_database(manager, [RECORD, dict(RECORD, id="cen_en_2", reference="EN 2")])
+    assert len(manager.get_records()) == 2
+    assert len(ConfigManager(str(tmp_path)).get_records()) == 2
+
+    # Same size, different mtime
+    stat = os.stat(manager.standards_db_file)
+    write_database(manager, [RECORD, dict(RECORD, id="cen_en_3", reference="EN 3")])
+    os.utime(manager.standards_db_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert os.stat(manager.standards_db_file).st_size == stat.st_size
+    assert [r.id for r in ConfigManager(str(tmp_path)).get_records()][-1] == "cen_en_3"
+
+
+def test_manager_survives_corrupt_cache(tmp_path):
+    manager = ConfigManager(str(tmp_path))
+    write_database(manager, [RECORD])
+    manager.get_records()
+    cache_file = os.path.splitext(manager.standards_db_file)[0] + ".cache"
+    with open(cache_file, "wb") as f:
+        f.write(CACHE_MAGIC + b"truncated")
+
+    fresh = ConfigManager(str(tmp_path))
+    assert [r.id for r in fresh.get_records()] == [RECORD["id"]]
+    # ...and rewrites it
+    assert read_snapshot(cache_file, file_signature(manager.standards_db_file)) is not None
@@ -0,0 +1,185 @@
+# Tests for payload parsing, the scan pipeline and the database writer
+import json
+import os
+import threading
+
+import pytest
+
+from config_manager import ConfigManager
+from src.history_store import HistoryStore
+from src.scan_pipeline import DatabaseWriter, ScanPipeline, fixture_jobs, parse_context, run_scan
+from src.utils.data_processor import make_record_id, parse_payload
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "scans")
+SCANNED_AT = "2025-10-01T00:00:00"
+
+
+def html_payload(rows, header="<tr><th>Standard reference:</th><th>Title</th><th>TC</th>"
+                              "<th>Work item</th><th>Notes</th></tr>"):
+    body = "<p>Intro</p><table><tr><td>not a header</td></tr>" + header + "".join(
+        "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows) + "</table>"
+    return {"organization": "cen", "format": "html", "body": body, "scanned_at": SCANNED_AT}
+
+
+def test_parse_html_maps_headers_and_normalizes_cells():
+    records = parse_payload(html_payload([
+        ["EN 13432:2000", "Packaging &amp;  composting\n requirements", "CEN/TC 261", "WI=00261001", "x"],
+        ["", "Row without a reference", "CEN/TC 261", "", ""],
+    ]))
+
+    assert records == [{
+        "id": "cen_en_13432_2000",
+        "reference": "EN 13432:2000",
+        "title": "Packaging & composting requirements",
+        "committee": "CEN/TC 261",
+        "wi_number": "WI=00261001",
+        "organization": "CEN",
+        "category": "",
+        "last_updated": SCANNED_AT,
+    }]
+
+
+def test_parse_html_without_known_header_finds_nothing():
+    assert parse_payload(html_payload([["EN 1:2000", "Title"]], header="<tr><th>Foo</th></tr>")) == []
+
+
+def test_parse_json_maps_alternate_keys():
+    body = json.dumps({"count": 2, "results": [
+        {"deliverable": "ISO 11607-1:2019", "ref": "ignored", "title_en": "Packaging",
+         "owner_committee": None, "Published": "2019-02-01", "category": "Medical devices"},
+        {"title": "No reference"},
+        "not a record",
+    ]})
+    records = parse_payload({"organization": "ISO", "format": "JSON", "body": body,
+                             "committee": "ISO/TC 198", "scanned_at": SCANNED_AT})
+
+    assert len(records) == 1
+    record = records[0]
+    assert record["reference"] == "ISO 11607-1:2019"
+    assert record["title"] == "Packaging"
+    assert record["committee"] == "ISO/TC 198"  # payload default when the item has none
+    assert record["publication_date"] == "2019-02-01"
+    assert record["category"] == "medical_devices"
+
+
+def test_parse_json_single_object():
+    body = json.dumps({"reference": "EN 1104:2018", "winumber": "WI=00172219"})
+    [record] = parse_payload({"organization": "CEN", "format": "json", "body": body})
+    assert record["wi_number"] == "WI=00172219"
+
+
+def test_parse_unknown_format_raises():
+    with pytest.raises(ValueError, match="Unknown payload format"):
+        parse_payload({"organization": "CEN", "format": "xml", "body": "<x/>"})
+
+
+def test_record_ids_keep_wi_placeholders():
+    assert make_record_id("CEN", "EN 1034-6:2005+A1:2009") == "cen_en_1034_6_2005_a1_2009"
+    assert make_record_id("CEN", "EN WI=00172215") == "cen_en_wi=00172215"
+
+
+def test_recorded_fixtures_parse_to_stored_ids():
+    ids = {r["id"] for job in fixture_jobs(FIXTURES) for r in parse_payload(job())}
+    assert {"cen_en_1034_1_2021", "cen_en_1034_6_2005_a1_2009", "iso_iso_10399_2017"} <= ids
+
+
+def test_pipeline_counts_records_and_errors():
+    good = {"organization": "CEN", "format": "json", "body": json.dumps([{"reference": "EN 1:2000"}])}
+
+    def failing_fetch():
+        raise ConnectionError("timeout")
+
+    jobs = [
+        lambda: good,
+        lambda: [good, None, good],  # a job may return several payloads
+        lambda: None,
+        failing_fetch,
+        lambda: {"organization": "CEN", "format": "json", "body": "{not json"},
+    ]
+    pipeline = ScanPipeline(io_workers=2, parse_workers=1, queue_size=1)
+    records = list(pipeline.run(jobs))
+
+    assert len(records) == 3
+    assert pipeline.stats["jobs"] == 5
+    assert pipeline.stats["payloads"] == 4
+    assert pipeline.stats["records"] == 3
+    assert pipeline.stats["errors"] == 2
+    assert any("Fetch failed: timeout" in e for e in pipeline.errors)
+    assert any(e.startswith("Parse failed") for e in pipeline.errors)
+
+
+def test_parse_processes_are_not_forked_from_the_threaded_parent():
+    assert parse_context().get_start_method() in ("forkserver", "spawn")
+
+
+def test_closing_the_stream_early_stops_the_fetchers():
+    pipeline = ScanPipeline(io_workers=4, parse_workers=1, queue_size=1)
+    stream = pipeline.run(fixture_jobs(FIXTURES, repeat=20))
+    next(stream)
+    stream.close()
+    assert not any(t.name == "scan-io" for t in threading.enumerate())
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ConfigManager(str(tmp_path))
+
+
+def scanned(reference, organization="CEN", **fields):
+    record = {"id": make_record_id(organization, reference), "reference": reference, "title": "",
+              "committee": "", "wi_number": "", "organization": organization, "category": "",
+              "last_updated": SCANNED_AT}
+    record.update(fields)
+    return record
+
+
+def test_writer_adds_new_records_to_their_section(manager):
+    writer = DatabaseWriter(manager)
+    assert writer.add(scanned("EN 99999:2025", title="New"))
+    assert writer.add(scanned("ISO 99999:2025", organization="ISO", title="New"))
+    assert (writer.added, writer.updated) == (2, 0)
+
+    assert writer.commit()
+    saved = manager.get_standards_data(with_duplicates=False)
+    assert "cen_en_99999_2025" in {r["id"] for r in saved["cen_standards"]}
+    assert "iso_iso_99999_2025" in {r["id"] for r in saved["iso_standards"]}
+    assert saved["metadata"]["total_records"] == 5
+
+
+def test_writer_updates_without_clearing_stored_fields(manager):
+    writer = DatabaseWriter(manager)
+    # Default database holds EN 1034-1:2021 with WI=00198092 in CEN/TC 198
+    assert writer.add(scanned("EN 1034-1:2021", title="Renamed", committee=""))
+    assert not writer.add(scanned("EN 1034-1:2021", title="Renamed", last_updated="2030-01-01"))
+    assert (writer.added, writer.updated) == (0, 1)
+
+    writer.commit()
+    record = next(r for r in manager.get_standards_data(with_duplicates=False)["cen_standards"]
+                  if r["id"] == "cen_en_1034_1_2021")
+    assert record["title"] == "Renamed"
+    assert record["committee"] == "CEN/TC 198"
+    assert record["wi_number"] == "WI=00198092"
+    assert record["last_updated"] == SCANNED_AT
+
+
+def test_writer_without_changes_does_not_save(manager):
+    before = manager.get_record_table().version
+    writer = DatabaseWriter(manager)
+    assert not writer.add(scanned("EN 1034-1:2021"))
+    assert writer.commit()
+    assert manager.get_record_table().version == before
+
+
+def test_run_scan_merges_fixtures_and_records_history(manager):
+    result = run_scan(manager, fixture_jobs(FIXTURES), pipeline=ScanPipeline(parse_workers=1))
+
+    assert result["success"] and result["errors"] == []
+    assert result["added"] > 0 and result["scan_id"]
+    assert result["changes_found"] == result["added"] + result["updated"]
+    history = HistoryStore(os.path.join(manager.config_dir, "history"))
+    baseline, first = history.scans()
+    assert baseline["baseline"] and first["scan_id"] == result["scan_id"]
+    assert len(history.database_as_of(baseline["scanned_at"])["cen_standards"]) == 2
+
+    again = run_scan(manager, fixture_jobs(FIXTURES), pipeline=ScanPipeline(parse_workers=1))
+    assert again["changes_found"] == 0 and again["scan_id"] is None
@@ -3,6 +3,7 @@ import json
 import os
 from datetime import datetime
 from config_manager import config_manager
+from src.utils.ai_classifier import assess_committee
 
 
 # Initialize EEL with correct web folder path
@@ -12,7 +13,6 @@ eel.init('web')
 # Global state tracking
 app_state = {
     'last_scan': None,
-    'is_scanning': False,
     'language': 'en'  # CHANGED: Default to English
 }
 
@@ -168,11 +168,11 @@ def get_standards_data(organization=None, db_type='under_development'):
 @eel.expose
 def perform_scan():
     """Perform standards scanning operation"""
-    if app_state['is_scanning']:
+    # Check-and-claim in one step so two calls can't both start a scan
+    if not config_manager.scan_guard.try_acquire():
         return {'success': False, 'message': 'Scan already in progress'}
 
     try:
-        app_state['is_scanning'] = True
         print("Starting standards scan...")
 
         # Simulate scanning process
@@ -199,7 +199,7 @@ def perform_scan():
             'message': f'Scan failed: {str(e)}'
         }
     finally:
-        app_state['is_scanning'] = False
+        config_manager.scan_guard.release()
 
 
 @eel.expose
@@ -221,56 +221,9 @@ def assess_committee_ai(committee_name, committee_url=''):
     try:
         print(f"Assessing committee: {committee_name}")
 
-        # Simple keyword-based assessment for demo
-        packaging_keywords = [
-            'packaging', 'pack', 'container', 'bottle', 'box', 'bag', 'wrap', 
-            'label', 'recyclable', 'biodegradable', 'plastic', 'paper', 'board',
-            'food contact', 'barrier', 'sterilization', 'medical device'
-        ]
-
-        found_keywords = []
-        text_to_check = (committee_name + ' ' + committee_url).lower()
-
-        for keyword in packaging_keywords:
-            if keyword in text_to_check:
-                found_keywords.append(keyword)
-
-        # Calculate relevance score
-        base_score = min(len(found_keywords) * 15, 80)
-
-        # Boost score for specific committees
-        if 'tc 261' in text_to_check or 'tc 122' in text_to_check:
-            base_score += 20
-        if 'packaging' in text_to_check:
-            base_score += 15
-
-        relevance_score = min(base_score, 100)
-
-        # Generate assessment text
-        if relevance_score > 70:
-            assessment = "Highly relevant to packaging standards"
-            recommendation = "Strongly recommend including in monitoring"
-            confidence = "High"
-        elif relevance_score > 30:
-            assessment = "Moderately relevant to packaging"
-            recommendation = "Consider including with regular review"
-            confidence = "Medium"
-        else:
-            assessment = "Limited relevance to packaging standards"
-            recommendation = "Low priority for packaging focus"
-            confidence = "Medium"
-
-        result = {
-            'success': True,
-            'relevance_score': relevance_score,
-            'assessment': assessment,
-            'recommendation': recommendation,
-            'keywords_found': found_keywords,
-            'confidence': confidence,
-            'committee_name': committee_name
-        }
+        result = assess_committee(committee_name, committee_url)
 
-        print(f"AI Assessment result: {relevance_score}% relevance")
+        print(f"AI Assessment result: {result['relevance_score']}% relevance")
         return result
 
     except Exception as e: